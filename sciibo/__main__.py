@@ -1,3 +1,6 @@
 from sciibo.core.screen import create_screen
 from sciibo.core.main import mainloop
-create_screen(mainloop)
+
+# Worker processes import this module without starting the game
+if __name__ == '__main__':
+    create_screen(mainloop)
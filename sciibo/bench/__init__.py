@@ -0,0 +1,2 @@
+from .corpus import corpus
+from .runner import compare, run
@@ -0,0 +1,59 @@
+import argparse
+import json
+import os
+import sys
+
+from .corpus import corpus
+from .runner import FUNCTIONS, compare, run
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m sciibo.bench', description="Benchmark the AI on a corpus of positions.")
+    parser.add_argument('-o', '--output', default=None, help="write results to JSON file")
+    parser.add_argument('-c', '--compare', default=None, metavar='BASELINE', help="compare with results in JSON file, fail on regressions")
+    parser.add_argument('--threshold', type=float, default=1.25, help="allowed ratio of time and positions compared to baseline")
+    parser.add_argument('--corpus', default=None, help="JSON file with positions, created from samples when missing")
+    parser.add_argument('-s', '--samples', type=int, default=50, help="number of positions sampled from simulated games")
+    parser.add_argument('--seed', type=int, default=0, help="seed for sampling positions")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="runs per position, fastest is kept")
+    parser.add_argument('--no-allocations', action='store_true', help="skip measuring memory allocations")
+    args = parser.parse_args()
+
+    # Baseline positions are used, so results are compared on the same work
+    baseline = None
+    if args.compare:
+        with open(args.compare) as stream:
+            baseline = json.load(stream)
+        positions = baseline['positions']
+    elif args.corpus and os.path.exists(args.corpus):
+        with open(args.corpus) as stream:
+            positions = json.load(stream)
+    else:
+        positions = corpus(args.samples, args.seed)
+        if args.corpus:
+            with open(args.corpus, 'w') as stream:
+                json.dump(positions, stream)
+
+    results = run(positions, repeat=args.repeat, allocations=not args.no_allocations)
+
+    print('%-16s %10s %10s %10s %12s' % ('Function', 'Time (s)', 'Expanded', 'Frontier', 'Allocated'))
+    for name, function in FUNCTIONS:
+        total = results['functions'][name]['total']
+        print('%-16s %10.4f %10d %10d %12s' % (
+            name, total['time'], total['expanded'], total['frontier'],
+            total['allocated'] if total['allocated'] is not None else '-'))
+
+    if args.output:
+        with open(args.output, 'w') as stream:
+            json.dump(results, stream, indent=1, sort_keys=True)
+
+    if baseline:
+        regressions = compare(baseline, results, args.threshold)
+        for regression in regressions:
+            print(regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
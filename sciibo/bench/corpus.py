@@ -0,0 +1,100 @@
+import io
+import random
+
+from sciibo.server.record import Recorder, Replay, read_games
+from sciibo.sim import Policy, Simulator
+
+
+# Hand-crafted positions that are expensive to search:
+# many SB cards, deep discard piles and far away stock cards
+WORST_CASES = [
+    {
+        'name': 'all-sb-hand',
+        'stock': 12,
+        'discards': [[12, 11, 10, 9, 8], [7, 6, 5, 4], [3, 2, 1], [12, 11]],
+        'hand': ['SB', 'SB', 'SB', 'SB', 'SB'],
+        'builds': [12, 12, 12, 12],
+    },
+    {
+        'name': 'sb-deep-discards',
+        'stock': 9,
+        'discards': [[12, 10, 8, 6, 4, 2], [11, 9, 7, 5, 3, 1], ['SB', 12, 6], [5, 'SB']],
+        'hand': ['SB', 'SB', 'SB', 1, 2],
+        'builds': [12, 12, 12, 12],
+    },
+    {
+        'name': 'sb-stock',
+        'stock': 'SB',
+        'discards': [[9, 8, 7], [6, 5, 4], [3, 2], ['SB', 1]],
+        'hand': ['SB', 'SB', 10, 11, 1],
+        'builds': [12, 3, 6, 9],
+    },
+    {
+        'name': 'unreachable-stock',
+        'stock': 9,
+        'discards': [[5, 4], [3], [8], []],
+        'hand': [1, 1, 2, 2, 'SB'],
+        'builds': [12, 12, 12, 12],
+    },
+    {
+        'name': 'mixed-builds',
+        'stock': 7,
+        'discards': [[12, 'SB', 4], [11, 3], ['SB', 2], [10, 1]],
+        'hand': ['SB', 5, 'SB', 6, 1],
+        'builds': [2, 5, 8, 11],
+    },
+]
+
+
+def sample_positions(count=50, seed=0, players=2, cards=15):
+    """
+    Returns positions players calculated moves for in simulated
+    games, picked at random with a fixed seed.
+    """
+    stream = io.StringIO()
+    rng = random.Random(seed)
+    simulator = Simulator(
+        [Policy(budget=2000) for n in range(players)],
+        cards=cards,
+        rng=rng,
+        recorder=Recorder(stream),
+    )
+
+    # Collect unique positions until there are enough to choose from
+    positions = {}
+    while len(positions) < count * 4:
+        stream.seek(0)
+        stream.truncate()
+        simulator.play()
+        stream.seek(0)
+
+        for events in read_games(stream):
+            for ply, player, stock, discards, hand, builds in Replay(events).positions():
+                # Hand is empty until cards are drawn
+                if not hand:
+                    continue
+                key = repr((stock, discards, sorted(hand, key=str), builds))
+                positions.setdefault(key, {
+                    'stock': stock,
+                    'discards': discards,
+                    'hand': hand,
+                    'builds': builds,
+                })
+
+    # Keys sorted so the same seed gives the same sample
+    sample = [positions[key] for key in sorted(positions)]
+    sample = rng.sample(sample, count)
+    for n, position in enumerate(sample):
+        position['name'] = 'sampled-%d' % n
+    return sample
+
+
+def corpus(samples=50, seed=0):
+    """
+    Returns the hand-crafted worst cases followed by positions
+    sampled from simulated games.
+    """
+    positions = [dict(position) for position in WORST_CASES]
+    if samples:
+        positions += sample_positions(samples, seed)
+    return positions
@@ -0,0 +1,132 @@
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2
+    tracemalloc = None
+
+from sciibo.bot import ai
+
+
+def run_stock_moves(position, stats):
+    return ai.stock_moves(position['stock'], position['discards'], position['hand'], position['builds'], stats=stats)
+
+
+def run_most_moves(position, stats):
+    return ai.most_moves(position['discards'], position['hand'], position['builds'], stats=stats)
+
+
+def run_lucky_move(position, stats):
+    return ai.lucky_move(position['stock'], position['discards'], position['hand'], position['builds'])
+
+
+def run_calculate_move(position, stats):
+    return ai.calculate_move(position['stock'], position['discards'], position['hand'], position['builds'], stats=stats)
+
+
+# Functions to benchmark, in order of the report
+FUNCTIONS = [
+    ('stock_moves', run_stock_moves),
+    ('most_moves', run_most_moves),
+    ('lucky_move', run_lucky_move),
+    ('calculate_move', run_calculate_move),
+]
+
+
+def measure(function, position, repeat=3, allocations=True):
+    """
+    Runs a function on a position and returns the fastest wall time
+    of `repeat` runs, the search counters, and the peak memory
+    allocated in bytes when tracemalloc is available.
+    """
+    best = None
+    for n in range(repeat):
+        stats = ai.SearchStats()
+        start_time = ai.clock()
+        function(position, stats)
+        duration = ai.clock() - start_time
+        if best is None or duration < best:
+            best = duration
+
+    result = {
+        'time': best,
+        'generated': stats.generated,
+        'expanded': stats.expanded,
+        'duplicates': stats.duplicates,
+        'frontier': stats.frontier,
+        'allocated': None,
+    }
+
+    # Separate run, tracing slows down allocations
+    if allocations and tracemalloc:
+        tracemalloc.start()
+        try:
+            function(position, ai.SearchStats())
+            result['allocated'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return result
+
+
+def run(positions, repeat=3, allocations=True, functions=None):
+    """
+    Benchmarks each function on each position.
+
+    Returns a dictionary with the results per function and position,
+    and the totals per function: time, expanded positions, peak
+    frontier and peak allocations.
+    """
+    functions = functions or FUNCTIONS
+    results = {
+        'positions': positions,
+        'functions': {},
+    }
+
+    for name, function in functions:
+        entries = {}
+        for position in positions:
+            entries[position['name']] = measure(function, position, repeat, allocations)
+
+        allocated = [entry['allocated'] for entry in entries.values() if entry['allocated'] is not None]
+        results['functions'][name] = {
+            'positions': entries,
+            'total': {
+                'time': sum(entry['time'] for entry in entries.values()),
+                'expanded': sum(entry['expanded'] for entry in entries.values()),
+                'frontier': max(entry['frontier'] for entry in entries.values()) if entries else 0,
+                'allocated': max(allocated) if allocated else None,
+            },
+        }
+
+    return results
+
+
+def compare(baseline, current, threshold=1.25, minimum=0.001):
+    """
+    Compares benchmark results with a baseline and returns a message
+    for each total or position that got slower or expanded more
+    positions than `threshold` times the baseline.
+
+    Times below `minimum` seconds are too noisy to compare.
+    """
+    regressions = []
+
+    for name, function in sorted(current['functions'].items()):
+        if name not in baseline['functions']:
+            continue
+        base = baseline['functions'][name]
+
+        checks = [('total', base['total'], function['total'])]
+        for position, entry in sorted(function['positions'].items()):
+            if position in base['positions']:
+                checks.append((position, base['positions'][position], entry))
+
+        for label, old, new in checks:
+            if max(old['time'], new['time']) >= minimum and new['time'] > old['time'] * threshold:
+                regressions.append('%s %s: time %.4fs -> %.4fs (%.2fx)' % (
+                    name, label, old['time'], new['time'], new['time'] / max(old['time'], 1e-9)))
+            if new['expanded'] > old['expanded'] * threshold:
+                regressions.append('%s %s: expanded %d -> %d' % (
+                    name, label, old['expanded'], new['expanded']))
+
+    return regressions
@@ -1,14 +1,126 @@
 from __future__ import division
 
 import collections
+import heapq
 import random
 import time
 
 from sciibo.core.helpers import nextcard, fitson
 
+from .position import Position
+
+try:
+    # Python 3
+    clock = time.perf_counter
+except AttributeError:
+    # Python 2
+    clock = time.time
+
 
 class CalculationTimeout(Exception):
-    pass
+    """
+    Raised when a search runs out of time or node budget. Holds
+    the best list of moves found so far, if any, as `moves`.
+    """
+
+    def __init__(self, moves=None):
+        super(CalculationTimeout, self).__init__()
+        self.moves = moves
+
+
+class SearchLimit(object):
+    """
+    Limits a search by the number of positions it expands
+    and optionally by the time in seconds it takes.
+
+    A node budget gives the same moves on every machine,
+    regardless of how busy it is. A search can also be stopped
+    from another thread by setting the `cancel` threading.Event.
+
+    Searches supporting it keep at most `beam` positions of
+    each number of cards played, which caps their memory use.
+    """
+
+    def __init__(self, timeout=None, budget=None, cancel=None, beam=None):
+        self.timeout = timeout
+        self.budget = budget
+        self.cancel = cancel
+        self.beam = beam
+
+        # Keep time to enforce calculation time limit
+        self.start_time = clock()
+
+        # Number of positions expanded so far
+        self.expanded = 0
+
+    def expand(self):
+        """
+        Counts an expanded position, returns False if the
+        search has run out of time or node budget.
+        """
+        self.expanded += 1
+        if self.budget is not None and self.expanded > self.budget:
+            return False
+        if self.timeout and clock() - self.start_time > self.timeout:
+            return False
+        if self.cancel is not None and self.cancel.is_set():
+            return False
+        return True
+
+
+class SearchStats(object):
+    """
+    Counters filled in by the search functions.
+    """
+
+    def __init__(self):
+        # Number of positions created from expanded positions
+        self.generated = 0
+
+        # Number of positions taken from the queue and expanded
+        self.expanded = 0
+
+        # Number of positions skipped because they were reached before
+        self.duplicates = 0
+
+        # Largest number of positions waiting in a queue
+        self.frontier = 0
+
+        # Seconds spent by calculate_move finding moves
+        # that get rid of the stock card, and the most moves
+        self.stock_time = 0.0
+        self.most_time = 0.0
+
+        # Number of times calculate_move ran out of time and fell back
+        # to moves found so far ('anytime'), 'lucky' or 'discard' moves,
+        # and the last kind of fallback
+        self.fallbacks = 0
+        self.fallback = None
+
+    def add(self, other):
+        """
+        Adds the counters of another SearchStats object,
+        used to merge the results of parallel searches.
+        """
+        self.generated += other.generated
+        self.expanded += other.expanded
+        self.duplicates += other.duplicates
+        self.frontier = max(self.frontier, other.frontier)
+        self.stock_time += other.stock_time
+        self.most_time += other.most_time
+        self.fallbacks += other.fallbacks
+        self.fallback = other.fallback or self.fallback
+
+    def timed_out(self, fallback):
+        """
+        Counts a fallback after running out of time.
+        """
+        self.fallbacks += 1
+        self.fallback = fallback
+
+    def __repr__(self):
+        return '<SearchStats generated=%d expanded=%d duplicates=%d frontier=%d stock_time=%.3f most_time=%.3f fallbacks=%d>' % (
+            self.generated, self.expanded, self.duplicates, self.frontier, self.stock_time, self.most_time, self.fallbacks)
 
 
 def enumerate_unique(cards):
@@ -79,6 +191,39 @@ def place(cards, pos, card):
     return result
 
 
+def unwind(path):
+    """
+    Returns the list of moves of a path of nested (move, parent) pairs,
+    which the searches use so children share the moves of their parent.
+
+    Example:
+    > unwind(((3, 'hand', 'build:0'), ((2, 'hand', 'build:0'), None)))
+    [(2, 'hand', 'build:0'), (3, 'hand', 'build:0')]
+    """
+    moves = []
+    while path:
+        move, path = path
+        moves.append(move)
+    moves.reverse()
+    return moves
+
+
+def move_score(move):
+    """
+    Returns what a move adds to the score of a list of moves, where
+    playing fewer SB cards counts first and more hand cards second.
+
+    A search never plays more than five hand cards,
+    so an SB card outweighs all hand cards.
+
+    Example:
+    > move_score(('SB', 'hand', 'build:0'))
+    -7
+    """
+    value, source, target = move
+    return (source == 'hand') - 8 * (value == 'SB')
+
+
 def best_moves(result):
     """
     For each list of moves, count the number of hand cards and the
@@ -105,176 +250,597 @@ def best_moves(result):
             return moves
 
 
-def stock_moves(stock, discards, hand, builds, timeout=None):
+def stock_moves(stock, discards, hand, builds, timeout=None, budget=None, stats=None, executor=None, cache=None, best_first=True, cancel=None, rng=None, beam=None):
     """
     Returns the shortest list of cards to move
     to get rid of the stock card.
 
     Note: Five SB cards will be considered 'better'
     than six non-SB cards, because it uses fewer cards.
+
+    Positions that are reached through a different order of
+    moves are only expanded once. Pass a SearchStats object
+    as `stats` to receive node counts. The search is limited to
+    `timeout` seconds and to expanding `budget` positions, and
+    stops early when the `cancel` threading.Event is set.
+
+    When a concurrent.futures executor is given and the stock
+    card is an SB, each build pile is tried in parallel.
+
+    Completed calculations are stored in and taken from
+    `cache`, a MoveCache, when given.
+
+    Uses a best-first search by default, set `best_first` to False
+    to use the reference breadth-first search instead.
+
+    Equally good build piles for an SB stock card are chosen
+    with `rng`, a random.Random instance, or the random module,
+    comparing the most moves found with beam width `beam`.
     """
+    if stats is None:
+        stats = SearchStats()
+
+    if rng is None:
+        rng = random
 
     if not stock:
         return
 
+    if cache is not None:
+        key = ('stock', stock, Position.create(discards, hand, builds), beam)
+        moves = cache.get(key)
+        if moves is not None:
+            return moves or None
+
+        # Not stored when calculation times out, an SB stock card
+        # is placed on moves found so far but not stored either
+        if stock == 'SB':
+            moves, stopped = sb_stock_moves(discards, hand, builds, timeout, budget, stats, executor, cancel, rng, beam)
+        else:
+            moves = stock_moves(stock, discards, hand, builds, timeout=timeout, budget=budget, stats=stats, executor=executor, best_first=best_first, cancel=cancel, rng=rng, beam=beam)
+            stopped = False
+        if not stopped:
+            cache.put(key, moves)
+        return moves
+
     # Stock card is SB, can be placed on any pile
     if stock == 'SB':
-        # Calculate number of possible subsequent moves per build pile.
-        result = []
-        builds_unique = list(enumerate_unique(builds))
+        return sb_stock_moves(discards, hand, builds, timeout, budget, stats, executor, cancel, rng, beam)[0]
+
+    # Start with no moves, the stock card never changes
+    position = Position.create(discards, hand, builds)
+
+    limit = SearchLimit(timeout, budget, cancel)
+
+    if best_first:
+        return search_stock_moves_best_first(stock, position, limit, stats)
+
+    return search_stock_moves(stock, position, limit, stats)
+
+
+def sb_stock_moves(discards, hand, builds, timeout, budget, stats, executor, cancel, rng, beam):
+    """
+    Returns the move placing an SB stock card on the build pile that
+    allows the most subsequent moves, and whether any search stopped
+    early, in which case the pile is chosen on the moves found so far.
+    """
+    # Calculate number of possible subsequent moves per build pile.
+    result = []
+    stopped = False
+    builds_unique = list(enumerate_unique(builds))
+
+    # Node budget is divided evenly between build piles
+    limit = budget // len(builds_unique) if budget is not None else None
+
+    if executor:
+        # Each build pile gets the full calculation time
+        deadline = time.time() + timeout if timeout else None
+        futures = []
+        for pos, card in builds_unique:
+            position = Position.create(discards, hand, place(builds, pos, nextcard(card)))
+            futures.append((pos, executor.submit(search_branch, position, None, 0, deadline, limit, beam)))
+
+        for pos, future in futures:
+            moves, branch_stats, timed_out = future.result()
+            stats.add(branch_stats)
+            stopped = stopped or timed_out
+            result.append((pos, len(moves) if moves else 0))
+
+    else:
         for pos, card in builds_unique:
             new_builds = place(builds, pos, nextcard(card))
-            limit = timeout / len(builds_unique) if timeout else None
+            seconds = timeout / len(builds_unique) if timeout else None
             try:
-                moves = most_moves(discards, hand, new_builds, timeout=limit)
-                result.append((pos, len(moves) if moves else 0))
-            except CalculationTimeout:
-                pass
+                moves = most_moves(discards, hand, new_builds, timeout=seconds, budget=limit, stats=stats, cancel=cancel, beam=beam)
+            except CalculationTimeout as error:
+                # Use the moves found before running out of time
+                moves = error.moves
+                stopped = True
+            result.append((pos, len(moves) if moves else 0))
 
-        # Get build pile number that gives us the most
-        # subsequent moves (might be zero)
-        maxmoves = max(moves for pos, moves in result)
-        result = [pos for pos, moves in result if moves == maxmoves]
+    # Get build pile number that gives us the most
+    # subsequent moves (might be zero)
+    maxmoves = max(moves for pos, moves in result)
+    result = [pos for pos, moves in result if moves == maxmoves]
 
-        # Choose random build pile when multiple equal most subsequent moves
-        pos = random.choice(result)
-        return [(stock, 'stock', 'build:%d' % pos)]
+    # Choose random build pile when multiple equal most subsequent moves
+    pos = rng.choice(result)
+    return [('SB', 'stock', 'build:%d' % pos)], stopped
 
-    # Keep time to enforce calculation time limit
-    start_time = time.time()
 
-    # Keep moves of same length to calculate best move later
-    result = []
+def stock_children(position, unique_builds):
+    """
+    Yields the move and the new position for each
+    card that can be played from a position.
+    """
+    # Hand cards take precedence over discard cards
+    for hand_card in position.hand_cards():
+        for pos, card in unique_builds:
+            if fitson(card, hand_card):
+                yield (hand_card, 'hand', 'build:%d' % pos), position.play_hand(hand_card, pos)
+
+    for discard_pos, discard_card in position.top_cards():
+        for pos, card in unique_builds:
+            if fitson(card, discard_card):
+                yield (discard_card, 'discard:%d' % discard_pos, 'build:%d' % pos), position.play_discard(discard_pos, pos)
 
-    # Start with no moves
+
+def search_stock_moves(stock, position, limit, stats):
+    """
+    Breadth-first search for stock_moves, trying all
+    lists of moves of one length before the next.
+    """
+    # Keep best moves of same length, see best_moves
+    best = None
+    best_score = None
+
+    # Start with an empty path of moves
     queue = collections.deque()
-    queue.append((stock, discards, hand, builds, []))
+    queue.append((position, None, 0))
+
+    # Positions already queued, the same after
+    # swapping build piles or swapping discard piles
+    visited = set([position.symmetric_key()])
 
     # Let queue empty out before moving on to results with one card more
     # Prevent duplicate moves because of SB cards
     queueable = collections.deque()
 
     while queue:
-        # Enforce calculation time limit
-        if timeout and time.time() - start_time > timeout:
+        # Enforce calculation limits
+        if not limit.expand():
             # Return with no results
             raise CalculationTimeout
 
-        stock, discards, hand, builds, moves = queue.popleft()
-        unique_builds = list(enumerate_unique(builds))
+        position, path, score = queue.popleft()
+        unique_builds = list(enumerate_unique(position.builds))
+        stats.expanded += 1
 
         # Build pile numbers the stock card can be placed upon
         finalmoves = [pos for pos, card in unique_builds if fitson(card, stock)]
 
-        # Stock card can be played, store results and wait for queue to empty
+        # Stock card can be played, store results and wait for queue to empty.
+        # Keep first result with most hand cards and least SB cards.
         if finalmoves:
-            for pos in finalmoves:
-                result.append(moves + [(stock, 'stock', 'build:%d' % pos)])
+            if best is None or score > best_score:
+                best = ((stock, 'stock', 'build:%d' % finalmoves[0]), path)
+                best_score = score
 
         # Don't look for result with more cards if stock can be played
         else:
-            # Hand cards take precedence over discard cards
-            for hand_card in set(hand):
-                for pos, card in unique_builds:
-                    if fitson(card, hand_card):
-                        new_hand = pull(hand, hand_card)
-                        new_builds = place(builds, pos, nextcard(card))
-                        new_moves = moves + [(hand_card, 'hand', 'build:%d' % pos)]
-                        queueable.append((stock, discards, new_hand, new_builds, new_moves))
-
-            for discard_pos, discard_card in top_cards(discards):
-                for pos, card in unique_builds:
-                    if fitson(card, discard_card):
-                        new_discards = pull_top(discards, discard_pos)
-                        new_builds = place(builds, pos, nextcard(card))
-                        new_moves = moves + [(discard_card, 'discard:%d' % discard_pos, 'build:%d' % pos)]
-                        queueable.append((stock, new_discards, hand, new_builds, new_moves))
+            for move, new_position in stock_children(position, unique_builds):
+                stats.generated += 1
+
+                # Same position was reached by playing cards in another order
+                key = new_position.symmetric_key()
+                if key in visited:
+                    stats.duplicates += 1
+                    continue
+                visited.add(key)
+
+                queueable.append((new_position, (move, path), score + move_score(move)))
+
+            if len(queue) + len(queueable) > stats.frontier:
+                stats.frontier = len(queue) + len(queueable)
 
         # Queue has been emptied
         if not queue:
             # There are results (of equal length)
-            if result:
-                # Select result with most hand cards and least SB cards
-                return best_moves(result)
+            if best:
+                return unwind(best)
 
             # No results, continue with next queue (one extra card played)
             queue = queueable
             queueable = collections.deque()
 
 
-def most_moves(discards, hand, builds, timeout=None):
+def stock_distance(stock, builds):
     """
-    Returns the list of cards to move
-    to get rid of as many cards as possible.
+    Returns the least number of cards that must be played
+    before the stock card fits on any of the build piles.
 
-    Note: Six SB cards will be considered 'better'
-    than five non-SB cards, because it plays more cards.
+    Every card raises one build pile by one, so no list of
+    moves freeing the stock card can be shorter than this.
+
+    Example:
+    > stock_distance(5, [1, 2, 10, 12])
+    2
     """
+    return min((stock - 1 - card) % 12 for card in builds)
 
-    # Keep time to enforce calculation time limit
-    start_time = time.time()
 
-    # Start with no moves
-    queue = collections.deque()
-    queue.append((discards, hand, builds, [], [None, None, None, None]))
+def search_stock_moves_best_first(stock, position, limit, stats):
+    """
+    Best-first (A*) search for stock_moves, expanding lists of moves
+    in order of their length plus the stock_distance still to go.
 
-    # Keep moves of same length to calculate best move later
-    result = []
-    length = 0
+    Lists of moves with the same estimate are expanded in the order
+    search_stock_moves would find them, so both give the same result.
+    """
+    # Keep best moves of same length, see best_moves
+    best = None
+    best_score = None
+    length = None
+
+    # Queue entries are sorted by estimated total length, then by their
+    # rank in breadth-first order. The rank is a nested pair of the rank
+    # of the parent and the child number, so shorter lists come first
+    # and lists of the same length are compared move by move.
+    queue = [(stock_distance(stock, position.builds), (), 0, position, None, 0)]
+
+    # Positions already expanded, the same after
+    # swapping build piles or swapping discard piles
+    visited = set()
 
     while queue:
-        # Enforce calculation time limit
-        if timeout and time.time() - start_time > timeout:
+        # Enforce calculation limits
+        if not limit.expand():
             # Return with no results
             raise CalculationTimeout
 
-        discards, hand, builds, moves, top = queue.popleft()
-        unique_builds = list(enumerate_unique(builds))
+        estimate, rank, depth, position, path, score = heapq.heappop(queue)
+
+        # All shorter lists of moves have been tried
+        if length is not None and estimate > length:
+            break
+
+        # Same position was reached by playing cards in another order
+        key = position.symmetric_key()
+        if key in visited:
+            stats.duplicates += 1
+            continue
+        visited.add(key)
+
+        unique_builds = list(enumerate_unique(position.builds))
+        stats.expanded += 1
+
+        # Build pile numbers the stock card can be placed upon
+        finalmoves = [pos for pos, card in unique_builds if fitson(card, stock)]
+
+        # Stock card can be played, store results and
+        # expand positions that might give the same length
+        if finalmoves:
+            length = depth
+            if best is None or score > best_score:
+                best = ((stock, 'stock', 'build:%d' % finalmoves[0]), path)
+                best_score = score
+
+        # Don't look for result with more cards if stock can be played
+        else:
+            for n, (move, new_position) in enumerate(stock_children(position, unique_builds)):
+                stats.generated += 1
+                if new_position.symmetric_key() in visited:
+                    stats.duplicates += 1
+                    continue
+
+                estimate = depth + 1 + stock_distance(stock, new_position.builds)
+                heapq.heappush(queue, (estimate, (rank, n), depth + 1, new_position, (move, path), score + move_score(move)))
+
+            if len(queue) > stats.frontier:
+                stats.frontier = len(queue)
+
+    if best:
+        return unwind(best)
+
+
+def most_children(position, sbtop):
+    """
+    Yields the move, the new position and the new SB bits
+    for each card that can be played from a position.
+
+    Build piles with an SB card on top are kept as bits
+    in an integer, bit n for build pile n.
+    """
+    # Build piles with the same value are only the same
+    # when both or neither have an SB card on top
+    if sbtop:
+        unique_builds = [
+            (pos, card & 15) for pos, card in
+            enumerate_unique([card | (sbtop >> n & 1) << 4 for n, card in enumerate(position.builds)])
+        ]
+    else:
+        unique_builds = list(enumerate_unique(position.builds))
+
+    # Hand cards take precedence over discard cards
+    for hand_card in position.hand_cards():
+        for pos, card in unique_builds:
+            if fitson(card, hand_card):
+                new_position = position.play_hand(hand_card, pos)
+
+                # Last hand card is an SB, allow it to pass through check 1 in search_most_moves
+                # Does not work is last *two* hand cards are SB
+                if hand_card == 'SB' and (new_position.hand or sbtop & 1 << pos):
+                    new_sbtop = sbtop | 1 << pos
+                else:
+                    new_sbtop = sbtop & ~(1 << pos)
+
+                yield (hand_card, 'hand', 'build:%d' % pos), new_position, new_sbtop
+
+    for discard_pos, discard_card in position.top_cards():
+        for pos, card in unique_builds:
+            if fitson(card, discard_card):
+                new_position = position.play_discard(discard_pos, pos)
+
+                if discard_card == 'SB':
+                    new_sbtop = sbtop | 1 << pos
+                else:
+                    new_sbtop = sbtop & ~(1 << pos)
+
+                yield (discard_card, 'discard:%d' % discard_pos, 'build:%d' % pos), new_position, new_sbtop
+
+
+def search_most_moves(position, path, sbtop, limit, stats):
+    """
+    Breadth-first search for most_moves, starting from a
+    position reached by playing the moves in `path`.
+
+    With a beam width set on the limit, only the positions with the
+    best score (see move_score) are kept of each number of cards
+    played. Positions with equal scores are kept in the order they
+    were found, so the result is the same as without a beam as long
+    as no positions are dropped.
+    """
+    queue = collections.deque()
+    moves = unwind(path)
+    queue.append((position, path, len(moves), sbtop, sum(move_score(move) for move in moves)))
+
+    # Positions with one card more than those in queue
+    queueable = []
+
+    # Positions already queued, including which build piles have an SB on top,
+    # the same after swapping build piles or swapping discard piles
+    visited = set([position.symmetric_key(sbtop)])
+
+    # Keep first of the longest moves with most hand cards
+    # and least SB cards, see best_moves
+    best = None
+    best_score = None
+    length = 0
+
+    while queue:
+        # Enforce calculation limits
+        if not limit.expand():
+            # Return with the best result of the longest moves found so far
+            raise CalculationTimeout(unwind(best) if best else None)
+
+        position, path, depth, sbtop, score = queue.popleft()
+        stats.expanded += 1
 
         # Store result if SB card was not placed on top of build pile [1]
-        if moves and 'SB' not in top:
-            # More moves than previously found, discard other results
+        if path and not sbtop:
+            # More moves than previously found, or better moves of same length
+            if depth > length or score > best_score:
+                best = path
+                best_score = score
+                length = depth
+
+        for move, new_position, new_sbtop in most_children(position, sbtop):
+            stats.generated += 1
+
+            # Same position was reached by playing cards in another order
+            key = new_position.symmetric_key(new_sbtop)
+            if key in visited:
+                stats.duplicates += 1
+                continue
+            visited.add(key)
+
+            queueable.append((new_position, (move, path), depth + 1, new_sbtop, score + move_score(move)))
+
+        if len(queue) + len(queueable) > stats.frontier:
+            stats.frontier = len(queue) + len(queueable)
+
+        # Queue has been emptied, continue with positions with one card more
+        if not queue:
+            if limit.beam is not None and len(queueable) > limit.beam:
+                queueable = heapq.nsmallest(limit.beam, queueable, key=beam_key)
+            queue.extend(queueable)
+            queueable = []
+
+    if best:
+        return unwind(best)
+
+
+def beam_key(node):
+    """
+    Returns the sort key of a search_most_moves queue entry
+    for pruning, positions with the best score first.
+    """
+    return -node[4]
+
+
+def search_branch(position, path, sbtop, deadline, budget, beam=None):
+    """
+    Runs search_most_moves in a worker process until `deadline`, a
+    time.time() value as the clock must be the same in all processes.
+    Returns the moves, the node counts and whether the search stopped early.
+    """
+    stats = SearchStats()
+    limit = SearchLimit(max(deadline - time.time(), 1e-6) if deadline else None, budget, beam=beam)
+    try:
+        return search_most_moves(position, path, sbtop, limit, stats), stats, False
+    except CalculationTimeout as error:
+        return error.moves, stats, True
+
+
+def most_moves_parallel(executor, position, timeout, budget, stats, beam=None):
+    """
+    Searches each first move of most_moves in a separate process
+    and merges the results in the order the moves are generated.
+    """
+    deadline = time.time() + timeout if timeout else None
+
+    branches = []
+    visited = set()
+    stats.expanded += 1
+    for move, new_position, new_sbtop in most_children(position, 0):
+        stats.generated += 1
+        key = new_position.symmetric_key(new_sbtop)
+        if key in visited:
+            stats.duplicates += 1
+            continue
+        visited.add(key)
+        branches.append((new_position, (move, None), new_sbtop))
+
+    # Node budget is divided evenly between branches
+    limit = budget // len(branches) if budget is not None and branches else None
+
+    futures = [
+        executor.submit(search_branch, new_position, path, new_sbtop, deadline, limit, beam)
+        for new_position, path, new_sbtop in branches
+    ]
+
+    # Keep best moves of each branch with the same length
+    result = []
+    length = 0
+    timed_out = False
+
+    for future in futures:
+        moves, branch_stats, branch_timed_out = future.result()
+        stats.add(branch_stats)
+        timed_out = timed_out or branch_timed_out
+
+        if moves:
             if len(moves) > length:
                 result = []
                 length = len(moves)
-            result.append(moves)
-
-        # Hand cards take precedence over discard cards
-        for hand_card in set(hand):
-            for pos, card in unique_builds:
-                if fitson(card, hand_card):
-                    new_hand = pull(hand, hand_card)
-                    new_builds = place(builds, pos, nextcard(card))
-                    new_moves = moves + [(hand_card, 'hand', 'build:%d' % pos)]
-
-                    # Last hand card is an SB, allow it to pass through check 1 above
-                    # Does not work is last *two* hand cards are SB
-                    if not new_hand and hand_card == 'SB' and top[pos] != 'SB':
-                        new_top = place(top, pos, nextcard(card))
-                    else:
-                        new_top = place(top, pos, hand_card)
-
-                    queue.append((discards, new_hand, new_builds, new_moves, new_top))
-
-        for discard_pos, discard_card in top_cards(discards):
-            for pos, card in unique_builds:
-                if fitson(card, discard_card):
-                    new_discards = pull_top(discards, discard_pos)
-                    new_builds = place(builds, pos, nextcard(card))
-                    new_moves = moves + [(discard_card, 'discard:%d' % discard_pos, 'build:%d' % pos)]
-                    new_top = place(top, pos, discard_card)
-                    queue.append((new_discards, hand, new_builds, new_moves, new_top))
-
-    # Select result with most hand cards and least SB cards
-    if result:
-        return best_moves(result)
+            if len(moves) == length:
+                result.append(moves)
+
+    # Best moves of each branch are the first of their branch,
+    # so selecting from them gives the same result as one search.
+    moves = best_moves(result) if result else None
+
+    if timed_out:
+        raise CalculationTimeout(moves)
+
+    return moves
+
+
+def most_moves(discards, hand, builds, timeout=None, budget=None, stats=None, executor=None, cache=None, cancel=None, beam=None):
+    """
+    Returns the list of cards to move
+    to get rid of as many cards as possible.
+
+    Note: Six SB cards will be considered 'better'
+    than five non-SB cards, because it plays more cards.
+
+    Positions that are reached through a different order of
+    moves are only expanded once. Pass a SearchStats object
+    as `stats` to receive node counts. The search is limited to
+    `timeout` seconds and to expanding `budget` positions, and
+    stops early when the `cancel` threading.Event is set.
+
+    When a concurrent.futures executor is given, each first
+    move is searched in parallel.
+
+    Completed calculations are stored in and taken from
+    `cache`, a MoveCache, when given.
+
+    Setting `beam` keeps at most that many positions of each number
+    of cards played, the ones with the best score. This caps the memory
+    used, but may miss the most moves.
+    """
+    if stats is None:
+        stats = SearchStats()
+
+    # Start with no moves and no SB cards on top of build piles
+    position = Position.create(discards, hand, builds)
+
+    if cache is not None:
+        key = ('most', position, beam)
+        moves = cache.get(key)
+        if moves is not None:
+            return moves or None
+
+        # Not stored when calculation times out
+        moves = most_moves(discards, hand, builds, timeout=timeout, budget=budget, stats=stats, executor=executor, cancel=cancel, beam=beam)
+        cache.put(key, moves)
+        return moves
+
+    if executor:
+        return most_moves_parallel(executor, position, timeout, budget, stats, beam)
+
+    return search_most_moves(position, None, 0, SearchLimit(timeout, budget, cancel, beam), stats)
+
+
+def play_move(position, sbtop, move):
+    """
+    Returns the new position and SB bits after playing
+    a move found by most_moves, see most_children.
+    """
+    value, source, target = move
+    pos = int(target.split(':')[1])
+
+    if source == 'hand':
+        new_position = position.play_hand(value, pos)
+        sb = value == 'SB' and (new_position.hand or sbtop & 1 << pos)
+    else:
+        new_position = position.play_discard(int(source.split(':')[1]), pos)
+        sb = value == 'SB'
+
+    if sb:
+        return new_position, sbtop | 1 << pos
+    return new_position, sbtop & ~(1 << pos)
+
+
+def extend_most_moves(discards, hand, builds, moves, timeout=None, budget=None, stats=None, cancel=None, beam=None):
+    """
+    Returns the most moves starting with `moves`, which play cards
+    from the hand and discard piles to the build piles.
+
+    Only positions reached after playing `moves` are searched, which
+    is used after drawing new cards halfway a turn: the moves calculated
+    before drawing still apply, only the moves after them change.
+    Returns `moves` when no more cards can be played after them.
+    """
+    if stats is None:
+        stats = SearchStats()
+
+    # Position and path at the end of the moves
+    position = Position.create(discards, hand, builds)
+    sbtop = 0
+    path = None
+    for move in moves:
+        position, sbtop = play_move(position, sbtop, move)
+        path = (move, path)
+
+    try:
+        result = search_most_moves(position, path, sbtop, SearchLimit(timeout, budget, cancel, beam), stats)
+    except CalculationTimeout as error:
+        # Best moves found so far
+        result = error.moves
+
+    if result and len(result) > len(moves):
+        return result
+    return list(moves)
 
 
 def lucky_move(stock, discards, hand, builds):
     """
     Returns if any non-SB card can be played to a build pile.
     """
-    unique_builds = list(enumerate_unique(builds))
+    position = Position.create(discards, hand, builds)
+    unique_builds = list(enumerate_unique(position.builds))
 
     # Stock card
     for pos, card in unique_builds:
@@ -282,7 +848,7 @@ def lucky_move(stock, discards, hand, builds):
             return [(stock, 'stock', 'build:%d' % pos)]
 
     # Non-SB hand cards
-    for hand_card in set(hand):
+    for hand_card in position.hand_cards():
         if hand_card == 'SB':
             continue
         for pos, card in unique_builds:
@@ -290,7 +856,7 @@ def lucky_move(stock, discards, hand, builds):
                 return [(hand_card, 'hand', 'build:%d' % pos)]
 
     # Non-SB discards
-    for discard_pos, discard_card in top_cards(discards):
+    for discard_pos, discard_card in position.top_cards():
         if discard_card == 'SB':
             continue
         for pos, card in unique_builds:
@@ -298,7 +864,7 @@ def lucky_move(stock, discards, hand, builds):
                 return [(discard_card, 'discard:%d' % discard_pos, 'build:%d' % pos)]
 
     # SB hand cards
-    for hand_card in set(hand):
+    for hand_card in position.hand_cards():
         if hand_card != 'SB':
             continue
         for pos, card in unique_builds:
@@ -306,7 +872,7 @@ def lucky_move(stock, discards, hand, builds):
                 return [(hand_card, 'hand', 'build:%d' % pos)]
 
     # SB discards
-    for discard_pos, discard_card in top_cards(discards):
+    for discard_pos, discard_card in position.top_cards():
         if discard_card != 'SB':
             continue
         for pos, card in unique_builds:
@@ -318,23 +884,30 @@ def any_move(stock, discards, hand, builds):
     """
     Returns if any card can be played to a build pile.
     """
-    for pile in builds:
+    position = Position.create(discards, hand, builds)
+    for pile in position.builds:
         if fitson(pile, stock):
             return True
 
-        if any(fitson(pile, card) for card in hand):
+        if any(fitson(pile, card) for card in position.hand_cards()):
             return True
 
-        if any(fitson(pile, card) for pos, card in top_cards(discards)):
+        if any(fitson(pile, card) for pos, card in position.top_cards()):
             return True
 
     return False
 
 
-def discard_move(discards, hand):
+def discard_move(discards, hand, rng=None):
     """
     Determines which card to discard to which pile.
+
+    Random choices are made with `rng`, a random.Random
+    instance, or the random module.
     """
+    if rng is None:
+        rng = random
+
     # Same card already in discards
     for discard_pos, discard_card in top_cards(discards):
         for card in set(hand):
@@ -347,7 +920,7 @@ def discard_move(discards, hand):
             # Choose random non-SB card
             normal_cards = [card for card in hand if card != 'SB']
             if normal_cards:
-                card = random.choice(normal_cards)
+                card = rng.choice(normal_cards)
                 return [(card, 'hand', 'discard:%d' % discard_pos)]
 
     # Look for next card to 'count down'
@@ -363,48 +936,126 @@ def discard_move(discards, hand):
                 return [(card, 'hand', 'discard:%d' % discard_pos)]
 
     # Choose random hand card and random discard pile
-    card = random.choice(hand)
-    discard_pos = random.randrange(4)
+    card = rng.choice(hand)
+    discard_pos = rng.randrange(4)
     return [(card, 'hand', 'discard:%d' % discard_pos)]
 
 
-def calculate_move(stock, discards, hand, builds, timeout=None):
+def calculate_move(stock, discards, hand, builds, timeout=None, budget=None, stats=None, anytime=False, executor=None, cache=None, cancel=None, rng=None, beam=None):
     """
     Calculates the next moves to make.
 
     May take up to a fixed number of seconds, otherwise
-    player waits too long.
+    player waits too long. The number of positions expanded
+    can be limited with `budget` as well, which makes the
+    moves independent of the speed of the machine. Node counts,
+    the time spent in both searches and fallbacks after running
+    out of time are added to `stats` when given.
+
+    With `anytime` set, half of the time and node budget is
+    reserved for finding the most moves, and the best moves
+    found when the search is stopped are played instead of
+    any move possible.
+
+    An optional concurrent.futures executor is used to
+    search independent moves in parallel, and an optional
+    MoveCache to reuse moves calculated before. Setting the
+    optional `cancel` threading.Event stops the searches
+    as if they ran out of time. Random choices are made
+    with `rng`, a random.Random instance, when given. Setting
+    `beam` caps the memory used to find the most moves, see
+    most_moves.
     """
-    if timeout:
-        start_time = time.time()
+    if stats is None:
+        stats = SearchStats()
+
+    if timeout or budget is not None or cancel is not None:
+        start_time = clock()
+        start_expanded = stats.expanded
 
         # Find moves that get rid of the stock card
         try:
-            moves = stock_moves(stock, discards, hand, builds, timeout=timeout)
+            seconds = timeout / 2 if anytime and timeout else timeout
+            limit = budget // 2 if anytime and budget is not None else budget
+            moves = stock_moves(stock, discards, hand, builds, timeout=seconds, budget=limit, stats=stats, executor=executor, cache=cache, cancel=cancel, rng=rng, beam=beam)
             if moves:
                 return moves
         except CalculationTimeout:
-            # There might be subsequent moves we didn't have time to calculate.
-            # Perform any move possible or discard
-            return lucky_move(stock, discards, hand, builds) or discard_move(discards, hand)
+            if not anytime:
+                # There might be subsequent moves we didn't have time to calculate.
+                # Perform any move possible or discard
+                return fallback_move(stock, discards, hand, builds, stats, rng)
+        finally:
+            stats.stock_time += clock() - start_time
 
         # Find moves that play the most number of cards
-        remaining = start_time + timeout - time.time()
+        most_time = clock()
+        seconds = max(start_time + timeout - most_time, 1e-6) if timeout else None
+        limit = max(budget - (stats.expanded - start_expanded), 0) if budget is not None else None
         try:
-            moves = most_moves(discards, hand, builds, timeout=remaining)
+            moves = most_moves(discards, hand, builds, timeout=seconds, budget=limit, stats=stats, executor=executor, cache=cache, cancel=cancel, beam=beam)
             if moves:
                 return moves
 
-        except CalculationTimeout:
+        except CalculationTimeout as error:
+            # Best moves found so far
+            if anytime and error.moves:
+                stats.timed_out('anytime')
+                return error.moves
+
             # There might be subsequent moves we didn't have time to calculate.
             # Perform any move possible or discard
-            return lucky_move(stock, discards, hand, builds) or discard_move(discards, hand)
+            return fallback_move(stock, discards, hand, builds, stats, rng)
+
+        finally:
+            stats.most_time += clock() - most_time
 
         # Don't perform lucky_move as it will play SB cards that most_moves deemed bad to play
-        return discard_move(discards, hand)
+        return discard_move(discards, hand, rng)
+
+    start_time = clock()
+    moves = stock_moves(stock, discards, hand, builds, stats=stats, executor=executor, cache=cache, rng=rng, beam=beam)
+    stats.stock_time += clock() - start_time
+    if moves:
+        return moves
+
+    start_time = clock()
+    moves = most_moves(discards, hand, builds, stats=stats, executor=executor, cache=cache, beam=beam)
+    stats.most_time += clock() - start_time
+
+    return moves or discard_move(discards, hand, rng)
+
+
+def cached_move(cache, stock, discards, hand, builds, rng=None, beam=None):
+    """
+    Returns the moves calculate_move returns for a position using
+    only moves stored in `cache`, or None when they are not stored.
+    """
+    position = Position.create(discards, hand, builds)
+
+    if stock:
+        moves = cache.get(('stock', stock, position, beam))
+        if moves is None:
+            return None
+        if moves:
+            return moves
+
+    moves = cache.get(('most', position, beam))
+    if moves is None:
+        return None
+
+    return moves or discard_move(discards, hand, rng)
+
+
+def fallback_move(stock, discards, hand, builds, stats, rng=None):
+    """
+    Returns any move possible or a discard move when calculate_move
+    ran out of time, and records which one in `stats`.
+    """
+    moves = lucky_move(stock, discards, hand, builds)
+    if moves:
+        stats.timed_out('lucky')
+        return moves
 
-    return (
-        stock_moves(stock, discards, hand, builds) or
-        most_moves(discards, hand, builds) or
-        discard_move(discards, hand)
-    )
+    stats.timed_out('discard')
+    return discard_move(discards, hand, rng)
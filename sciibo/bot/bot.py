@@ -1,3 +1,4 @@
+import logging
 import time
 from threading import Thread
 
@@ -5,17 +6,54 @@ from sciibo.core.helpers import Queue
 from sciibo.core.emitter import Emitter
 
 from .game import Game
-from .ai import calculate_move
+from .ai import SearchStats, calculate_move
+from .plan import Plan
+from .ponder import Ponderer
+
+
+logger = logging.getLogger(__name__)
 
 
 class Bot(Thread, Emitter):
-    def __init__(self, conn):
+    def __init__(self, conn, timeout=5.0, budget=None, executor=None, cache=None, ponder=False, think_time=1.5, rng=None, beam=None, gate=None):
         Thread.__init__(self)
         Emitter.__init__(self)
 
         # Indicates the thread should be stopped
         self.stopped = False
 
+        # Maximum calculation time in seconds
+        self.timeout = timeout
+
+        # Maximum number of positions to expand while calculating,
+        # makes moves independent of machine load
+        self.budget = budget
+
+        # Maximum number of positions kept per number of cards played
+        # while finding the most moves, caps memory use
+        self.beam = beam
+
+        # Optional process pool to calculate moves in parallel
+        self.executor = executor
+
+        # Optional cache of calculated moves, shared between bots
+        self.cache = cache
+
+        # Optional random.Random instance for random choices
+        self.rng = rng
+
+        # Minimum time a turn takes, emulates thinking
+        self.think_time = think_time
+
+        # Optional SearchGate shared with other bots, pondering
+        # waits while a bot searches on its turn
+        self.gate = gate
+
+        # Calculate moves for the next turn during turns of opponents
+        self.ponderer = None
+        if ponder:
+            self.ponderer = Ponderer(timeout=self.timeout, budget=self.budget, beam=self.beam, gate=gate)
+
         # Create game state
         self.game = Game()
 
@@ -23,26 +61,101 @@ class Bot(Thread, Emitter):
         self.conn = conn
         self.conn.on('receive', self.on_receive)
 
-        # List of calculated next moves
-        self.moves = None
+        # Calculated next moves
+        self.plan = Plan()
+
+        # Search counters of this game
+        self.stats = SearchStats()
+        self.calculations = 0
+        self.calculation_time = 0.0
+
+        # Slowest calculation of this game, seconds and position
+        self.slowest = None
 
         # Queue of incoming messages to be processed
         self.queue = Queue()
 
     def run(self):
+        if self.ponderer:
+            self.ponderer.start()
+
         while not self.stopped:
-            while not self.queue.empty():
-                data = self.queue.get()
-                self.on_message(data)
-                self.queue.task_done()
+            # Wait for next message
+            data = self.queue.get()
+            self.queue.task_done()
+
+            # Woken up by stop
+            if data is None:
+                break
 
-            time.sleep(0.2)
+            self.on_message(data)
+
+        if self.ponderer:
+            self.ponderer.stop()
 
         self.conn.stop()
 
     def stop(self):
         self.stopped = True
 
+        # Wake up thread waiting for messages
+        self.queue.put(None)
+
+    def ponder(self):
+        """
+        Starts calculating moves for the next turn.
+        """
+        if self.ponderer and self.game.hand is not None:
+            self.ponderer.ponder(
+                self.game.stock_card,
+                self.game.discard_piles,
+                self.game.hand,
+                self.game.build_piles,
+            )
+
+    def begin_search(self):
+        """
+        Marks the start of a search on the turn of this bot,
+        pondering bots wait until it ends.
+        """
+        if self.gate:
+            self.gate.begin()
+
+    def end_search(self):
+        if self.gate:
+            self.gate.end()
+
+    def add_stats(self, stats, duration):
+        """
+        Adds the counters of a calculation to the counters of this game.
+        """
+        self.stats.add(stats)
+        self.calculations += 1
+        self.calculation_time += duration
+
+        position = (
+            self.game.stock_card,
+            [pile[:] for pile in self.game.discard_piles],
+            self.game.hand[:],
+            self.game.build_piles[:],
+        )
+        if self.slowest is None or duration > self.slowest[0]:
+            self.slowest = (duration, position)
+
+        logger.debug("Bot %s calculated moves in %.3fs %r for position %r",
+                     self.game.player_id, duration, stats, position)
+
+    def log_stats(self):
+        """
+        Logs the counters of this game.
+        """
+        if not self.calculations:
+            return
+
+        logger.info("Bot %s calculated moves %d times in %.3fs %r, slowest %.3fs for position %r",
+                    self.game.player_id, self.calculations, self.calculation_time,
+                    self.stats, self.slowest[0], self.slowest[1])
+
     """
     Events
     """
@@ -59,31 +172,76 @@ class Bot(Thread, Emitter):
             self.game.on_start(data['order'], data['stock'], data['reveal'])
 
         if type == 'hand':
+            # Hand is known, stop calculating likely hands
+            if self.ponderer:
+                self.ponderer.cancel()
+
             self.game.on_hand(data['cards'])
 
+            # Drew new cards after emptying hand
+            self.begin_search()
+            try:
+                self.plan.repair(
+                    self.game,
+                    drawn=True,
+                    timeout=self.timeout,
+                    budget=self.budget,
+                    cache=self.cache,
+                    rng=self.rng,
+                    beam=self.beam,
+                )
+            finally:
+                self.end_search()
+
         if type == 'turn':
             # Our turn, calculate next move
             if data['player'] == self.game.player_id:
-                # Calculated next moves left
-                if not self.moves:
-                    start_time = time.time()
-                    self.moves = calculate_move(
+                # Moves calculated while pondering, played without delay
+                if not self.plan and self.ponderer:
+                    self.plan = Plan(self.ponderer.moves(
                         self.game.stock_card,
                         self.game.discard_piles,
                         self.game.hand,
                         self.game.build_piles,
-                        # Limit calculation time to 5 seconds
-                        timeout=5.0,
-                    )
+                        rng=self.rng,
+                    ))
+                    pondered = bool(self.plan)
+                else:
+                    pondered = False
+
+                # Calculated next moves left
+                if not self.plan:
+                    start_time = time.time()
+                    stats = SearchStats()
+                    self.begin_search()
+                    try:
+                        self.plan = Plan(calculate_move(
+                            self.game.stock_card,
+                            self.game.discard_piles,
+                            self.game.hand,
+                            self.game.build_piles,
+                            # Limit calculation time, play best moves found so far
+                            timeout=self.timeout,
+                            budget=self.budget,
+                            anytime=True,
+                            executor=self.executor,
+                            cache=self.cache,
+                            rng=self.rng,
+                            beam=self.beam,
+                            stats=stats,
+                        ))
+                    finally:
+                        self.end_search()
                     duration = time.time() - start_time
+                    self.add_stats(stats, duration)
 
                     # Emulate thinking time
-                    if duration < 1.5:
-                        time.sleep(1.5 - duration)
-                else:
-                    time.sleep(1.5)
+                    if duration < self.think_time:
+                        time.sleep(self.think_time - duration)
+                elif not pondered:
+                    time.sleep(self.think_time)
 
-                value, source, target = self.moves.pop(0)
+                value, source, target = self.plan.pop()
                 self.conn.send({
                     'type': 'play',
                     'value': value,
@@ -91,6 +249,10 @@ class Bot(Thread, Emitter):
                     'target': target,
                 })
 
+            # Turn of an opponent, prepare for our next turn
+            else:
+                self.ponder()
+
         if type == 'play':
             player = data['player']
             value = data['value']
@@ -100,5 +262,16 @@ class Bot(Thread, Emitter):
 
             self.game.on_play(player, value, source, target, reveal)
 
+            # Check remaining moves still apply
+            if player == self.game.player_id:
+                self.plan.repair(self.game)
+
+            # Build piles changed, start over
+            if player != self.game.player_id and target.startswith('build'):
+                self.ponder()
+
+        if type == 'end':
+            self.log_stats()
+
         if type == 'invalid':
             raise Exception("Bot sent invalid move, should not be possible")
@@ -0,0 +1,66 @@
+import collections
+import threading
+
+
+class MoveCache(object):
+    """
+    Least recently used cache of calculated moves by position.
+
+    Safe to share between bot threads. Moves are stored as tuples
+    and returned as new lists, as bots pop moves from their list.
+    """
+
+    def __init__(self, size=1024):
+        # Maximum number of positions to keep
+        self.size = size
+
+        # Cached moves, least recently used first
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Returns the moves stored for a key, an empty list when
+        no moves were possible, or None when the key is unknown.
+        """
+        with self.lock:
+            try:
+                moves = self.entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+
+            # Mark as most recently used
+            self.entries[key] = moves
+            self.hits += 1
+
+        return list(moves)
+
+    def put(self, key, moves):
+        """
+        Stores the moves for a key, None when no moves are possible.
+        """
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = tuple(moves or ())
+
+            # Remove least recently used entries
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return '<MoveCache size=%d/%d hits=%d misses=%d evictions=%d>' % (
+            len(self.entries), self.size, self.hits, self.misses, self.evictions)
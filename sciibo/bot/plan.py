@@ -0,0 +1,132 @@
+from sciibo.core.helpers import fitson, nextcard
+
+from .ai import CalculationTimeout, extend_most_moves, stock_moves
+
+
+BUILDS = ('build:0', 'build:1', 'build:2', 'build:3')
+DISCARDS = ('discard:0', 'discard:1', 'discard:2', 'discard:3')
+
+
+class Plan(object):
+    """
+    Moves left to play this turn.
+
+    Moves are calculated once per turn and played one by one.
+    After each move, and when five new cards are drawn after
+    emptying the hand, the remaining moves are checked against
+    the game state of the bot and dropped when they no longer
+    apply, so the bot calculates moves for the new position.
+    After drawing, valid moves are extended with the new cards.
+    """
+
+    def __init__(self, moves=None):
+        self.moves = list(moves or [])
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __bool__(self):
+        return bool(self.moves)
+
+    # Python 2
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return '<Plan %r>' % self.moves
+
+    def pop(self):
+        return self.moves.pop(0)
+
+    def clear(self):
+        self.moves = []
+
+    @property
+    def stock(self):
+        """
+        Returns if the plan gets rid of the stock card.
+        """
+        return any(source == 'stock' for value, source, target in self.moves)
+
+    def valid(self, game):
+        """
+        Returns if the remaining moves can be played
+        in the game state of the bot, in order.
+        """
+        stock = game.stock_card
+        discards = [pile[:] for pile in game.discard_piles]
+        hand = game.hand[:]
+        builds = game.build_piles[:]
+
+        for value, source, target in self.moves:
+            # Card must be available
+            if source == 'hand':
+                if value not in hand:
+                    return False
+                hand.remove(value)
+            elif source == 'stock':
+                if value != stock:
+                    return False
+                # Next stock card is unknown
+                stock = None
+            elif source in DISCARDS:
+                pile = discards[DISCARDS.index(source)]
+                if not pile or pile[-1] != value:
+                    return False
+                pile.pop()
+            else:
+                return False
+
+            # Card must fit on target
+            if target in BUILDS:
+                pos = BUILDS.index(target)
+                if not fitson(builds[pos], value):
+                    return False
+                builds[pos] = nextcard(builds[pos])
+            elif target in DISCARDS and source == 'hand':
+                discards[DISCARDS.index(target)].append(value)
+            else:
+                return False
+
+        return True
+
+    def repair(self, game, drawn=False, timeout=None, budget=None, cache=None, rng=None, beam=None):
+        """
+        Drops the remaining moves when they can no longer be played.
+
+        After drawing new cards (`drawn`) the new cards might allow
+        getting rid of the stock card or playing more cards. Moves
+        getting rid of the stock card are kept while still valid,
+        otherwise moves getting rid of the stock card with the new
+        cards are searched for, and else only the moves after the
+        remaining moves are searched for, see extend_most_moves.
+        The searches are limited by `timeout` and `budget`.
+
+        Returns False if the remaining moves were dropped.
+        """
+        if not self.moves:
+            return True
+
+        if not self.valid(game):
+            self.clear()
+            return False
+
+        if self.stock or not drawn:
+            return True
+
+        # Only the hand changed, stock card is still the same
+        stock = game.stock_card
+        discards = [pile[:] for pile in game.discard_piles]
+        hand = game.hand[:]
+        builds = game.build_piles[:]
+
+        try:
+            moves = stock_moves(stock, discards, hand, builds, timeout=timeout, budget=budget, cache=cache, rng=rng, beam=beam)
+        except CalculationTimeout:
+            moves = None
+
+        if moves:
+            self.moves = list(moves)
+        elif all(target in BUILDS and source != 'stock' for value, source, target in self.moves):
+            self.moves = extend_most_moves(discards, hand, builds, self.moves, timeout=timeout, budget=budget, beam=beam)
+
+        return True
@@ -0,0 +1,227 @@
+from threading import Condition, Event, Thread
+import itertools
+
+from .ai import cached_move, calculate_move
+from .cache import MoveCache
+
+
+# Number of cards of each value in a full deck, in a fixed order
+DECK = [('SB', 18)] + [(value, 12) for value in range(1, 13)]
+COUNTS = dict(DECK)
+
+
+def likely_hands(hand, max_draw=2):
+    """
+    Yields the hands a player may hold after drawing up to five cards,
+    most likely first. Yields nothing when more than `max_draw` cards
+    are drawn, as there are too many possible hands.
+
+    Example:
+    > list(likely_hands([1, 2, 3, 4]))[:2]
+    [[1, 2, 3, 4, 'SB'], [1, 2, 3, 4, 1]]
+    """
+    short = 5 - len(hand)
+    if short > max_draw:
+        return
+
+    draws = []
+    for cards in itertools.combinations_with_replacement([card for card, count in DECK], short):
+        # Chance of drawing these cards from a full deck, times the
+        # number of orders they can be drawn in
+        weight = 1
+        for n, card in enumerate(cards):
+            weight *= COUNTS[card] * float(n + 1) / cards[:n + 1].count(card)
+        draws.append((weight, cards))
+
+    # Stable sort keeps deck order for equally likely draws
+    draws.sort(key=lambda draw: -draw[0])
+
+    for weight, cards in draws:
+        yield hand + list(cards)
+
+
+class SearchGate(object):
+    """
+    Shared by the bots of a server, so pondering bots wait while
+    any bot searches moves on its real turn instead of competing
+    with it for processor time.
+    """
+
+    def __init__(self):
+        self.condition = Condition()
+
+        # Number of bots searching on their turn
+        self.searching = 0
+
+    def begin(self):
+        with self.condition:
+            self.searching += 1
+
+    def end(self):
+        with self.condition:
+            self.searching -= 1
+            self.condition.notify_all()
+
+    def busy(self):
+        return self.searching > 0
+
+    def wait(self, cancelled):
+        """
+        Waits until no bot is searching or `cancelled` is set.
+        """
+        with self.condition:
+            while self.searching and not cancelled.is_set():
+                self.condition.wait(0.1)
+
+
+class Interrupt(object):
+    """
+    Stops a pondering search when cancelled, or when
+    a bot starts searching on its turn.
+    """
+
+    def __init__(self, cancelled, gate=None):
+        self.cancelled = cancelled
+        self.gate = gate
+
+        # Stopped for a bot searching on its turn
+        self.yielded = False
+
+    def is_set(self):
+        if self.cancelled.is_set():
+            return True
+        if self.gate is not None and self.gate.busy():
+            self.yielded = True
+            return True
+        return False
+
+
+class Ponderer(Thread):
+    """
+    Calculates moves for the next turn in the background.
+
+    The own hand, stock card and discard piles don't change during
+    turns of opponents, except for the cards drawn at the start of
+    the next turn. Moves for the most likely hands are calculated
+    and stored in a MoveCache, so calculating them on the real turn
+    is a cache lookup. Searches stopped by cancelling are not stored.
+
+    Moves are stored in a cache of the ponderer itself, so they don't
+    push out moves calculated by bots on their turn, and at most
+    `max_hands` hands are calculated per position.
+    """
+
+    def __init__(self, cache=None, timeout=None, budget=None, max_draw=2, max_hands=20, beam=None, gate=None):
+        Thread.__init__(self)
+
+        # Don't keep the application running
+        self.daemon = True
+
+        # Moves calculated for likely hands
+        self.cache = cache if cache is not None else MoveCache(max_hands * 4)
+
+        # Calculation limits per hand
+        self.timeout = timeout
+        self.budget = budget
+        self.beam = beam
+
+        # Maximum number of drawn cards to calculate hands for,
+        # and maximum number of hands to calculate
+        self.max_draw = max_draw
+        self.max_hands = max_hands
+
+        # Optional SearchGate shared with other bots
+        self.gate = gate
+
+        # Indicates the thread should be stopped
+        self.stopped = False
+
+        # Position to calculate next
+        self.position = None
+        self.condition = Condition()
+
+        # Set to stop the current calculation
+        self.cancelled = Event()
+
+    def ponder(self, stock, discards, hand, builds):
+        """
+        Starts calculating moves for a position,
+        stopping any calculation in progress.
+        """
+        with self.condition:
+            self.cancelled.set()
+            self.position = (
+                stock,
+                [pile[:] for pile in discards],
+                hand[:],
+                builds[:],
+            )
+            self.condition.notify()
+
+    def moves(self, stock, discards, hand, builds, rng=None):
+        """
+        Returns the moves calculated while pondering for
+        a position, or None when they were not calculated.
+        """
+        return cached_move(self.cache, stock, discards, hand, builds, rng, self.beam)
+
+    def cancel(self):
+        """
+        Stops calculating.
+        """
+        with self.condition:
+            self.cancelled.set()
+            self.position = None
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.cancelled.set()
+            self.position = None
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.stopped and self.position is None:
+                    self.condition.wait()
+
+                if self.stopped:
+                    return
+
+                stock, discards, hand, builds = self.position
+                self.position = None
+                self.cancelled.clear()
+
+            self.calculate(stock, discards, hand, builds)
+
+    def calculate(self, stock, discards, hand, builds):
+        """
+        Calculates moves for each likely hand until cancelled.
+        """
+        hands = likely_hands(hand, self.max_draw)
+        for cards in itertools.islice(hands, self.max_hands):
+            while True:
+                if self.cancelled.is_set():
+                    return
+
+                # Don't compete with bots searching on their turn
+                if self.gate is not None:
+                    self.gate.wait(self.cancelled)
+
+                interrupt = Interrupt(self.cancelled, self.gate)
+                calculate_move(
+                    stock,
+                    discards,
+                    cards,
+                    builds,
+                    timeout=self.timeout,
+                    budget=self.budget,
+                    beam=self.beam,
+                    cache=self.cache,
+                    cancel=interrupt,
+                )
+
+                # Calculate the same hand again after the bot is done
+                if not interrupt.yielded:
+                    break
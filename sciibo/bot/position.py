@@ -0,0 +1,152 @@
+import collections
+
+from sciibo.core.helpers import nextcard
+
+
+# Card values in the order the AI tries them
+CARDS = ('SB', 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12)
+
+# Number of bits used to count each card value in a packed hand,
+# a hand never holds more than five cards.
+HAND_BITS = 3
+HAND_MASK = (1 << HAND_BITS) - 1
+
+
+def card_slot(card):
+    """
+    Returns the position of a card value in CARDS.
+    """
+    return 0 if card == 'SB' else card
+
+
+def encode_hand(cards):
+    """
+    Packs a list of hand cards into an integer holding
+    the number of cards of each value.
+
+    Example:
+    > encode_hand([2, 'SB', 2])
+    129
+    """
+    hand = 0
+    for card in cards:
+        hand += 1 << (HAND_BITS * card_slot(card))
+    return hand
+
+
+def decode_hand(hand):
+    """
+    Unpacks a packed hand into a list of cards.
+
+    Example:
+    > decode_hand(129)
+    ['SB', 2, 2]
+    """
+    cards = []
+    for card in CARDS:
+        cards += [card] * (hand & HAND_MASK)
+        hand >>= HAND_BITS
+    return cards
+
+
+def hand_cards(hand):
+    """
+    Yields each card value in a packed hand once.
+
+    Example:
+    > list(hand_cards(129))
+    ['SB', 2]
+    """
+    slot = 0
+    while hand:
+        if hand & HAND_MASK:
+            yield CARDS[slot]
+        hand >>= HAND_BITS
+        slot += 1
+
+
+def replace(items, pos, item):
+    """
+    Returns a tuple with the item at a given position replaced.
+    """
+    return items[:pos] + (item,) + items[pos + 1:]
+
+
+class Position(collections.namedtuple('Position', 'discards tops hand builds')):
+    """
+    Immutable and hashable cards of a player during the AI search.
+
+    discards: tuple of four discard piles (tuples, top card last)
+    tops: top card of each discard pile, None for empty piles
+    hand: packed hand, see encode_hand
+    builds: tuple with the top value of each of the four build piles
+    """
+    __slots__ = ()
+
+    @classmethod
+    def create(cls, discards, hand, builds):
+        """
+        Creates a position from the lists used by the game state.
+        """
+        discards = tuple(tuple(pile) for pile in discards)
+        tops = tuple(pile[-1] if pile else None for pile in discards)
+        return cls(discards, tops, encode_hand(hand), tuple(builds))
+
+    def hand_cards(self):
+        """
+        Yields each card value in the hand once.
+        """
+        return hand_cards(self.hand)
+
+    def top_cards(self):
+        """
+        Yields the pile number and top card of each non-empty discard pile.
+        """
+        for n, card in enumerate(self.tops):
+            if card is not None:
+                yield n, card
+
+    def play_hand(self, card, pos):
+        """
+        Returns the position after playing a hand card to build pile `pos`.
+        """
+        return Position(
+            self.discards,
+            self.tops,
+            self.hand - (1 << (HAND_BITS * card_slot(card))),
+            replace(self.builds, pos, nextcard(self.builds[pos])),
+        )
+
+    def play_discard(self, n, pos):
+        """
+        Returns the position after playing the top card of
+        discard pile `n` to build pile `pos`.
+        """
+        pile = self.discards[n][:-1]
+        return Position(
+            replace(self.discards, n, pile),
+            replace(self.tops, n, pile[-1] if pile else None),
+            self.hand,
+            replace(self.builds, pos, nextcard(self.builds[pos])),
+        )
+
+    def symmetric_key(self, sbtop=0):
+        """
+        Returns a key that is equal for positions that only differ in
+        the order of the build piles or the order of the discard piles.
+
+        The bits of `sbtop` mark build piles with an SB on top and
+        are kept with their build pile.
+        """
+        # Discard piles can contain both numbers and SB cards which can't be
+        # compared, any fixed order will do to compare permutations.
+        discards = tuple(sorted(self.discards, key=hash))
+
+        # Keep SB bit with build pile value
+        if sbtop:
+            builds = [card | (sbtop >> n & 1) << 4 for n, card in enumerate(self.builds)]
+        else:
+            builds = list(self.builds)
+        builds.sort()
+
+        return discards, self.hand, tuple(builds)
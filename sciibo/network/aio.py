@@ -0,0 +1,127 @@
+"""
+Connections running in an asyncio event loop, counterpart of
+ConnectionThread and ConnectionHandler. Game hosting can be embedded
+in an asyncio application:
+
+    server = Server('Game', local=True)
+    server.start()
+    listener = await serve(server, port=5342)
+
+Clients connect with `Client(await connect(host))`.
+"""
+import asyncio
+
+from sciibo.core.emitter import Emitter
+from .framing import HEADER, MAX_MESSAGE, SEND_LIMIT, decode, encode
+
+
+class AsyncConnection(Emitter):
+    """
+    Sends and receives messages over asyncio streams.
+
+    The 'receive' event is triggered from the event loop for each
+    message, and with a disconnect message when the other side closes
+    the connection or doesn't keep up with more than `limit` bytes
+    queued. `send` and `stop` are safe to use from any thread.
+    """
+
+    def __init__(self, reader, writer, loop=None, limit=SEND_LIMIT):
+        Emitter.__init__(self)
+        self.reader = reader
+        self.writer = writer
+        self.loop = loop or asyncio.get_event_loop()
+
+        # Task reading messages
+        self.task = None
+
+        # Maximum number of bytes waiting to be sent
+        self.limit = limit
+
+        # Indicates the connection should be closed
+        self.stopped = False
+
+        # Player id this connection belongs to
+        self.player = None
+
+    def start(self):
+        self.loop.call_soon_threadsafe(self.begin)
+
+    def begin(self):
+        if not self.stopped:
+            self.task = self.loop.create_task(self.read())
+
+    def send(self, data):
+        self.loop.call_soon_threadsafe(self.write, encode(data))
+
+    def write(self, message):
+        if self.stopped:
+            return
+
+        if self.writer.transport.get_write_buffer_size() + len(message) > self.limit:
+            # Other side doesn't keep up
+            self.writer.transport.abort()
+            self.disconnected()
+            return
+
+        self.writer.write(message)
+
+    def stop(self):
+        """
+        Closes the connection after sending queued messages.
+        """
+        self.loop.call_soon_threadsafe(self.close)
+
+    def close(self):
+        if self.stopped:
+            return
+        self.stopped = True
+
+        # Transport sends buffered data before closing
+        self.writer.close()
+        if self.task:
+            self.task.cancel()
+
+    def disconnected(self):
+        if self.stopped:
+            return
+        self.close()
+        self.trigger('receive', self, {'type': 'disconnect'})
+
+    async def read(self):
+        try:
+            while True:
+                header = await self.reader.readexactly(HEADER.size)
+                size = HEADER.unpack(header)[0]
+                if size > MAX_MESSAGE:
+                    raise ValueError("Invalid message size %d" % size)
+                message = await self.reader.readexactly(size)
+                data = decode(message)
+                if data:
+                    self.trigger('receive', self, data)
+        except asyncio.CancelledError:
+            pass
+        except (asyncio.IncompleteReadError, OSError, ValueError):
+            # Closed, or not speaking our protocol
+            self.disconnected()
+
+
+async def serve(server, host='', port=5342):
+    """
+    Accepts connections for a local server, returns the asyncio server.
+    """
+    loop = asyncio.get_event_loop()
+
+    def connected(reader, writer):
+        server.add_connection(AsyncConnection(reader, writer, loop))
+
+    return await asyncio.start_server(connected, host, port)
+
+
+async def connect(host, port=5342):
+    """
+    Returns a started connection to a server.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    conn = AsyncConnection(reader, writer)
+    conn.start()
+    return conn
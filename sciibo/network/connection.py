@@ -1,84 +1,147 @@
+from threading import Condition, Thread
+import select
 import socket
-import json
-import struct
-
-from sciibo.core.helpers import Queue
 
+from .framing import SEND_LIMIT, FrameBuffer, encode
+from .reactor import WOULDBLOCK
 from .thread import SocketThread
 
 
+def wait_writable(sock, timeout):
+    """
+    Waits at most `timeout` seconds until a socket can be written to.
+    Uses poll where available, as select fails on file descriptors
+    of 1024 and above.
+    """
+    if hasattr(select, 'poll'):
+        poller = select.poll()
+        poller.register(sock, select.POLLOUT)
+        poller.poll(timeout * 1000)
+    else:
+        # Windows
+        select.select([], [sock], [], timeout)
+
+
 class ConnectionThread(SocketThread):
-    def __init__(self, sock):
+    """
+    Sends and receives messages.
+
+    Messages are received by this thread and sent by a separate writer
+    thread, so sending never waits for receiving and the other way
+    around. Messages sent while the writer is busy are sent together.
+
+    At most `limit` bytes are queued for sending. A connection with a
+    reader too slow to keep up is disconnected, instead of queueing
+    messages forever or blocking the sending thread.
+    """
+
+    def __init__(self, sock, limit=SEND_LIMIT, linger=1.0):
         super(ConnectionThread, self).__init__()
         self.sock = sock
-        # The number of bytes we are expecting
-        self.expecting = None
-        # Partial message we received so far
-        self.partial = None
-        # Outgoing message queue
-        self.queue = Queue()
+        # Received bytes not yet handled
+        self.frames = FrameBuffer()
         # Player id this connection belongs to
         self.player = None
 
+        # Bytes waiting to be sent
+        self.outgoing = bytearray()
+        self.condition = Condition()
+
+        # Bytes taken by the writer but not sent yet
+        self.sending = 0
+
+        # Maximum number of bytes waiting to be sent
+        self.limit = limit
+
+        # Seconds to keep sending queued messages after stopping
+        self.linger = linger
+
+        # Disconnected because the other side is too slow
+        self.dropped = False
+
+        self.writer = Thread(target=self.write)
+        self.writer.daemon = True
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
     def disconnected(self):
         self.stop()
         self.trigger('receive', self, {'type': 'disconnect'})
 
     def action(self):
-        if not self.expecting:
-            # Send messages
-            while not self.queue.empty():
-                data = self.queue.get()
-                message = json.dumps(data)
-                self.sock.sendall(struct.pack("i", len(message)) + message.encode())
-                self.queue.task_done()
-
-            # Receive message size
-            data = self.sock.recv(struct.calcsize("i"))
-
-            if not data:
-                self.disconnected()
-                return
-
-            # We are now looking for a message
-            self.expecting = struct.unpack("i", data)[0]
-            self.partial = ""
-            return
-
-        # Receive at most what we are expecting
-        data = self.sock.recv(self.expecting)
-
-        if not data:
+        if not self.frames.recv_into(self.sock):
             self.disconnected()
             return
 
-        # Bytes to string
-        data = data.decode()
-
-        self.partial += data
-        self.expecting -= len(data)
-
-        # Received complete message
-        if not self.expecting:
-            try:
-                data = json.loads(self.partial)
-            except ValueError:
-                return
+        # Handle all complete messages
+        try:
+            for data in self.frames.messages():
+                self.trigger('receive', self, data)
+        except ValueError:
+            # Not speaking our protocol
+            self.disconnected()
 
-            if not isinstance(data, dict):
+    def send(self, data):
+        """
+        Queues a message, safe to use from any thread.
+        """
+        message = encode(data)
+        with self.condition:
+            if self.dropped:
                 return
 
-            type = data.get('type')
-            if not type:
+            if len(self.outgoing) + self.sending + len(message) <= self.limit:
+                self.outgoing += message
+                self.condition.notify()
                 return
 
-            self.trigger('receive', self, data)
+            # Other side doesn't keep up, drop queued messages
+            self.dropped = True
+            self.outgoing = bytearray()
 
-            self.expecting = None
-            self.partial = None
+        self.disconnected()
 
-    def send(self, data):
-        self.queue.put(data)
+    def write(self):
+        """
+        Sends queued messages until stopped, runs in the writer thread.
+        """
+        while True:
+            with self.condition:
+                while not self.outgoing and not self.stopped:
+                    self.condition.wait()
+
+                if not self.outgoing or self.dropped:
+                    return
+
+                # Send all queued messages at once
+                pending = self.outgoing
+                self.outgoing = bytearray()
+                self.sending = len(pending)
+
+            view = memoryview(pending)
+            while view and not self.dropped:
+                try:
+                    wait_writable(self.sock, 0.2)
+                    sent = self.sock.send(view)
+                except socket.error as error:
+                    if error.args[0] in WOULDBLOCK:
+                        continue
+                    # Receiving thread notices the connection error
+                    return
+                except ValueError:
+                    # Socket closed, file descriptor is -1
+                    return
+
+                view = view[sent:]
+                with self.condition:
+                    self.sending -= sent
+
+    def before_actions(self):
+        self.sock.setblocking(0)
+        self.writer.start()
 
     def on_error(self):
         # Trigger disconnect when an error occurs, but not
@@ -87,11 +150,4 @@ class ConnectionThread(SocketThread):
 
     def after_actions(self):
         # Send out queued messages before closing socket
-        try:
-            while not self.queue.empty():
-                data = self.queue.get()
-                message = json.dumps(data)
-                self.sock.sendall(struct.pack("i", len(message)) + message.encode())
-                self.queue.task_done()
-        except socket.error:
-            return
+        self.writer.join(self.linger)
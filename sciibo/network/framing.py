@@ -0,0 +1,154 @@
+import json
+import struct
+
+
+# Message length prefix
+HEADER = struct.Struct("i")
+
+# Bytes queued for sending before the other side
+# is considered too slow and gets disconnected
+SEND_LIMIT = 1024 * 1024
+
+# Largest message accepted, a larger size in the
+# header means the other side isn't speaking our protocol
+MAX_MESSAGE = 4 * SEND_LIMIT
+
+
+class Frame(object):
+    """
+    Message encoded at most once, for sending the same message
+    to many connections. Network connections send the encoded
+    bytes, proxy connections pass on the message itself.
+
+    Example:
+    > frame = Frame({'type': 'turn', 'player': 1})
+    > for conn in connections:
+    >     conn.send(frame)
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.encoded = None
+
+    @property
+    def message(self):
+        # Encoding twice when used by threads at once is harmless
+        if self.encoded is None:
+            self.encoded = encode(self.data)
+        return self.encoded
+
+
+def encode(data):
+    """
+    Returns a message as bytes prefixed with its length,
+    a frame is only encoded once.
+    """
+    if isinstance(data, Frame):
+        return data.message
+
+    message = json.dumps(data).encode()
+    return HEADER.pack(len(message)) + message
+
+
+def decode(message):
+    """
+    Returns the message in bytes without length prefix,
+    or None if it is not a valid message.
+    """
+    try:
+        data = json.loads(message.decode())
+    except ValueError:
+        return None
+
+    if not isinstance(data, dict) or not data.get('type'):
+        return None
+
+    return data
+
+
+class FrameBuffer(object):
+    """
+    Receive buffer splitting a stream of bytes in messages.
+
+    Bytes are received straight into a preallocated buffer, so a
+    message is only copied once, when it is complete. Any number of
+    messages may arrive in one read, and a message may be split over
+    any number of reads. The buffer grows for messages larger than it.
+
+    Example:
+    > frames = FrameBuffer()
+    > frames.recv_into(sock)
+    > for data in frames.messages():
+    >     print(data['type'])
+    """
+
+    def __init__(self, size=65536, max_message=MAX_MESSAGE):
+        # Largest message accepted
+        self.max_message = max_message
+
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+
+        # Bytes from start to end are received but not handled yet
+        self.start = 0
+        self.end = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def reserve(self):
+        """
+        Makes room at the end of the buffer, by moving unhandled bytes
+        to the front, or growing the buffer when it is full.
+        """
+        if self.end < len(self.buffer):
+            return
+
+        if self.start:
+            pending = self.end - self.start
+            self.buffer[:pending] = self.view[self.start:self.end]
+            self.start, self.end = 0, pending
+            return
+
+        # Buffer can't be resized while a view exists, Python 2
+        # has no release but dropping the last reference does
+        if hasattr(self.view, 'release'):
+            self.view.release()
+        self.view = None
+        self.buffer.extend(bytearray(len(self.buffer)))
+        self.view = memoryview(self.buffer)
+
+    def recv_into(self, sock):
+        """
+        Receives bytes from a socket, returns the number of bytes
+        received, which is zero when the other side closed the socket.
+        """
+        self.reserve()
+        count = sock.recv_into(self.view[self.end:])
+        self.end += count
+        return count
+
+    def messages(self):
+        """
+        Yields each complete message received, skipping invalid messages.
+        Raises ValueError for a negative size or one over `max_message`.
+        """
+        while self.end - self.start >= HEADER.size:
+            size = HEADER.unpack_from(self.buffer, self.start)[0]
+            if size < 0 or size > self.max_message:
+                raise ValueError("Invalid message size %d" % size)
+
+            begin = self.start + HEADER.size
+            if self.end - begin < size:
+                break
+
+            message = self.view[begin:begin + size].tobytes()
+            self.start = begin + size
+
+            data = decode(message)
+            if data:
+                yield data
+
+        # Nothing pending, start at the front again
+        if self.start == self.end:
+            self.start = self.end = 0
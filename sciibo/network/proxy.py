@@ -1,4 +1,5 @@
 from sciibo.core.emitter import Emitter
+from .framing import Frame
 
 
 class ProxyConnection(Emitter):
@@ -6,6 +7,9 @@ class ProxyConnection(Emitter):
         raise NotImplementedError
 
     def on_receive(self, data):
+        if isinstance(data, Frame):
+            data = data.data
+
         type = data.get('type')
         if not type:
             return
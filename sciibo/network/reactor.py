@@ -0,0 +1,366 @@
+from threading import Lock, Thread
+import collections
+import errno
+import logging
+import socket
+
+try:
+    import selectors
+except ImportError:
+    # Python 2, use the SocketThread classes instead
+    selectors = None
+
+from sciibo.core.emitter import Emitter
+from .framing import SEND_LIMIT, FrameBuffer, encode
+
+
+# Errors meaning the socket is not ready yet
+WOULDBLOCK = (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR)
+
+# Errors of a connection that was aborted before it was accepted
+ABORTED = (errno.ECONNABORTED,)
+
+logger = logging.getLogger(__name__)
+
+
+class Reactor(Thread):
+    """
+    Runs the sockets of many handlers in a single thread,
+    waking up only when a socket is ready.
+
+    Handlers have a `sock` and an `on_readable` method, and an
+    `on_writable` method when they register for writing. Handlers
+    are only used from the reactor thread, other threads schedule
+    work with `call`.
+
+    An exception raised by a handler only closes that handler,
+    through its `on_error` method, the reactor keeps running.
+    """
+
+    def __init__(self):
+        Thread.__init__(self)
+
+        # Don't keep the application running
+        self.daemon = True
+
+        # Indicates the thread should be stopped
+        self.stopped = False
+
+        self.selector = selectors.DefaultSelector()
+
+        # Functions scheduled by other threads
+        self.calls = collections.deque()
+
+        # Writing a byte wakes up the reactor
+        self.waker, self.wakee = socket.socketpair()
+        self.waker.setblocking(0)
+        self.wakee.setblocking(0)
+        self.selector.register(self.wakee, selectors.EVENT_READ, None)
+
+    def call(self, function, *args):
+        """
+        Runs a function in the reactor thread, safe to use from any thread.
+        """
+        self.calls.append((function, args))
+        try:
+            self.waker.send(b'\0')
+        except socket.error:
+            # Buffer full, reactor wakes up anyway
+            pass
+
+    def register(self, handler, events=None):
+        self.selector.register(handler.sock, events or selectors.EVENT_READ, handler)
+
+    def modify(self, handler, events):
+        """
+        Changes the events of a handler, returns False if
+        the handler is not registered (anymore).
+        """
+        try:
+            self.selector.modify(handler.sock, events, handler)
+        except (KeyError, ValueError):
+            return False
+        return True
+
+    def unregister(self, handler):
+        try:
+            self.selector.unregister(handler.sock)
+        except (KeyError, ValueError):
+            pass
+
+    def failed(self, handler):
+        logger.exception("Error in network handler %r", handler)
+        if handler is None:
+            return
+        try:
+            handler.on_error()
+        except Exception:
+            logger.exception("Error closing network handler %r", handler)
+
+    def stop(self):
+        self.call(self.shutdown)
+
+    def shutdown(self):
+        self.stopped = True
+
+    def run(self):
+        while not self.stopped:
+            for key, events in self.selector.select():
+                handler = key.data
+
+                # Woken up to run scheduled calls
+                if handler is None:
+                    try:
+                        while self.wakee.recv(4096):
+                            pass
+                    except socket.error:
+                        pass
+                    continue
+
+                # Handler might have been closed by an earlier event
+                if handler.closed:
+                    continue
+
+                try:
+                    if events & selectors.EVENT_READ:
+                        handler.on_readable()
+                    if events & selectors.EVENT_WRITE and not handler.closed:
+                        handler.on_writable()
+                except Exception:
+                    self.failed(handler)
+
+            while self.calls:
+                function, args = self.calls.popleft()
+                try:
+                    function(*args)
+                except Exception:
+                    # Close handler the call was scheduled for
+                    handler = getattr(function, '__self__', None)
+                    self.failed(handler if isinstance(handler, Handler) else None)
+
+        # Close all sockets of handlers
+        for key in list(self.selector.get_map().values()):
+            if key.data is not None:
+                key.data.close()
+
+        self.selector.close()
+        self.waker.close()
+        self.wakee.close()
+
+
+class Handler(Emitter):
+    """
+    Socket run by a reactor.
+    """
+
+    def __init__(self, reactor, sock):
+        Emitter.__init__(self)
+        self.reactor = reactor
+        self.sock = sock
+        self.sock.setblocking(0)
+        self.closed = False
+
+    def start(self):
+        """
+        Starts handling the socket, counterpart of Thread.start.
+        """
+        self.reactor.call(self.reactor.register, self)
+
+    def stop(self):
+        """
+        Stops handling the socket, safe to use from any thread.
+        """
+        self.reactor.call(self.close)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.reactor.unregister(self)
+        self.sock.close()
+
+    def on_readable(self):
+        raise NotImplementedError
+
+    def on_error(self):
+        # Called by the reactor when the handler raised an exception
+        self.close()
+
+
+class ListenHandler(Handler):
+    """
+    Accepts connections, counterpart of ListenThread.
+    """
+
+    def __init__(self, reactor):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(('', 5342))
+        sock.listen(5)
+        Handler.__init__(self, reactor, sock)
+
+    def on_readable(self):
+        try:
+            conn, address = self.sock.accept()
+        except socket.error as error:
+            if error.args[0] in WOULDBLOCK + ABORTED:
+                return
+            raise
+        self.trigger('connect', conn, address)
+
+
+class BroadcastHandler(Handler):
+    """
+    Answers servers searches, counterpart of BroadcastThread.
+    """
+
+    def __init__(self, reactor):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(('', 5342))
+        Handler.__init__(self, reactor, sock)
+
+    def on_readable(self):
+        try:
+            data, address = self.sock.recvfrom(4096)
+        except socket.error as error:
+            if error.args[0] in WOULDBLOCK:
+                return
+            raise
+        self.trigger('discover', address)
+
+    def send(self, address, data):
+        try:
+            self.sock.sendto(data.encode(), address)
+        except socket.error:
+            # Searching client might be gone
+            pass
+
+
+class ConnectionHandler(Handler):
+    """
+    Sends and receives messages, counterpart of ConnectionThread.
+
+    Messages are JSON objects prefixed with their length. The
+    'receive' event is triggered for each message, and with a
+    disconnect message when the other side closes the connection
+    or doesn't keep up with more than `limit` bytes queued.
+    """
+
+    def __init__(self, reactor, sock, limit=SEND_LIMIT):
+        Handler.__init__(self, reactor, sock)
+
+        # Received bytes not yet handled
+        self.frames = FrameBuffer()
+
+        # Bytes waiting to be sent
+        self.outgoing = bytearray()
+        self.lock = Lock()
+
+        # Maximum number of bytes waiting to be sent
+        self.limit = limit
+
+        # Registered for writing
+        self.writing = False
+
+        # Close after sending outgoing bytes
+        self.closing = False
+
+        # Player id this connection belongs to
+        self.player = None
+
+    def send(self, data):
+        """
+        Queues a message, safe to use from any thread.
+        """
+        if self.closed:
+            return
+
+        message = encode(data)
+        with self.lock:
+            if len(self.outgoing) + len(message) > self.limit:
+                # Other side doesn't keep up, drop queued messages
+                self.outgoing = bytearray()
+                self.reactor.call(self.disconnected)
+                return
+            self.outgoing += message
+        self.reactor.call(self.flush)
+
+    def start(self):
+        Handler.start(self)
+
+        # Send messages queued before registering
+        self.reactor.call(self.flush)
+
+    def stop(self):
+        """
+        Closes the connection after sending queued messages.
+        """
+        self.reactor.call(self.finish)
+
+    def finish(self):
+        self.closing = True
+        self.flush()
+
+    def disconnected(self):
+        if self.closed:
+            return
+        self.close()
+        self.trigger('receive', self, {'type': 'disconnect'})
+
+    def on_error(self):
+        self.disconnected()
+
+    def flush(self):
+        """
+        Sends as many queued bytes as the socket accepts,
+        waits for the socket to be writable for the rest.
+        """
+        if self.closed:
+            return
+
+        with self.lock:
+            try:
+                sent = self.sock.send(self.outgoing) if self.outgoing else 0
+            except socket.error as error:
+                if error.args[0] not in WOULDBLOCK:
+                    self.outgoing = bytearray()
+                    self.reactor.call(self.disconnected)
+                    return
+                sent = 0
+            del self.outgoing[:sent]
+            pending = bool(self.outgoing)
+
+        if not pending and self.closing:
+            self.close()
+        elif pending != self.writing:
+            # Not registered yet, flushed again after registering
+            if self.reactor.modify(self, selectors.EVENT_READ | selectors.EVENT_WRITE if pending else selectors.EVENT_READ):
+                self.writing = pending
+
+    def on_writable(self):
+        self.flush()
+
+    def on_readable(self):
+        try:
+            count = self.frames.recv_into(self.sock)
+        except socket.error as error:
+            if error.args[0] in WOULDBLOCK:
+                return
+            self.disconnected()
+            return
+
+        if not count:
+            self.disconnected()
+            return
+
+        # Handle all complete messages
+        try:
+            for data in self.frames.messages():
+                if self.closed:
+                    break
+                self.trigger('receive', self, data)
+        except ValueError:
+            # Not speaking our protocol
+            self.disconnected()
@@ -12,8 +12,8 @@ class Pile(object):
             value = [value]
         self.cards += value
 
-    def shuffle(self):
-        random.shuffle(self.cards)
+    def shuffle(self, rng=None):
+        (rng or random).shuffle(self.cards)
 
     def remove(self, n=1):
         if n < 1:
@@ -37,10 +37,10 @@ class Pile(object):
         return len(self.cards) == 0
 
     @classmethod
-    def fulldeck(cls):
+    def fulldeck(cls, rng=None):
         pile = cls()
         pile.add(list(range(1, 13)) * 12 + ["SB"] * 18)
-        pile.shuffle()
+        pile.shuffle(rng)
         return pile
 
 
@@ -60,7 +60,11 @@ class Player(object):
 
 
 class Game(object):
-    def __init__(self):
+    def __init__(self, rng=None):
+        # Shuffles decks and player order, a random.Random
+        # instance makes games reproducible
+        self.rng = rng or random
+
         # Game state
         self.started = False
         self.turn = None
@@ -159,7 +163,7 @@ class Game(object):
 
         if self.draw_pile.empty():
             # Place shuffled discards into draw pile
-            self.discard_pile.shuffle()
+            self.discard_pile.shuffle(self.rng)
             self.draw_pile = self.discard_pile
             self.discard_pile = Pile()
 
@@ -220,7 +224,7 @@ class Game(object):
         self.started = True
 
         # Create decks
-        self.draw_pile = Pile.fulldeck()
+        self.draw_pile = Pile.fulldeck(self.rng)
         self.discard_pile = Pile()
         self.build_piles = [
             Pile(),
@@ -231,7 +235,7 @@ class Game(object):
         self.build_cards = [12, 12, 12, 12]
 
         # Choose starting player and player order
-        random.shuffle(self.player_ids)
+        self.rng.shuffle(self.player_ids)
         self.turn = self.player_ids[0]
 
         # Deal out cards
@@ -0,0 +1,222 @@
+import io
+import json
+import threading
+
+from .game import Game
+
+
+class RecordingRandom(object):
+    """
+    Random number generator that records the result of each
+    shuffle, so games can be replayed without the generator.
+    """
+
+    def __init__(self, rng, recorder):
+        self.rng = rng
+        self.recorder = recorder
+
+    def shuffle(self, items):
+        self.rng.shuffle(items)
+        self.recorder.write('shuffle', cards=list(items))
+
+    def __getattr__(self, name):
+        return getattr(self.rng, name)
+
+
+class ReplayRandom(object):
+    """
+    Random number generator that repeats recorded shuffles.
+    """
+
+    def __init__(self, shuffles):
+        self.shuffles = list(shuffles)
+        self.index = 0
+
+    def shuffle(self, items):
+        if self.index >= len(self.shuffles):
+            raise ValueError("No shuffles left in record")
+
+        cards = self.shuffles[self.index]
+        if sorted(cards, key=str) != sorted(items, key=str):
+            raise ValueError("Recorded shuffle does not match cards")
+
+        items[:] = cards
+        self.index += 1
+
+
+class Recorder(object):
+    """
+    Writes the changes the server makes to the game state
+    to a file, one JSON object per line.
+
+    Events:
+    start: players (id, name, type) in joining order and stock size
+    shuffle: order of cards (or player ids) after each shuffle
+    play: card moved by a player
+    draw: cards drawn by the player at turn
+    turn: turn passed to next player
+    leave: player left the game
+    end: game ended, winner is None if undecided
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path):
+        """
+        Creates a recorder appending to the file at `path`.
+        """
+        return cls(io.open(path, 'a', encoding='utf-8'))
+
+    def random(self, rng):
+        """
+        Returns a generator recording shuffles made with `rng`.
+        """
+        return RecordingRandom(rng, self)
+
+    def write(self, event, **data):
+        data['event'] = event
+        line = json.dumps(data, separators=(',', ':'), sort_keys=True)
+        with self.lock:
+            # Text on Python 2 as well, for io streams
+            self.stream.write(u'%s\n' % line)
+            # Keep record of games that crash
+            self.stream.flush()
+
+    def start(self, players, cards):
+        self.write('start', cards=cards, players=[[player.id, player.name, player.type] for player in players])
+
+    def play(self, player, value, source, target):
+        self.write('play', player=player, value=value, source=source, target=target)
+
+    def draw(self, player, cards):
+        self.write('draw', player=player, cards=cards)
+
+    def turn(self, player):
+        self.write('turn', player=player)
+
+    def leave(self, player):
+        self.write('leave', player=player)
+
+    def end(self, winner=None):
+        self.write('end', winner=winner)
+
+    def close(self):
+        self.stream.close()
+
+
+def read_games(stream):
+    """
+    Reads recorded events from a stream and returns
+    a list of events for each game.
+    """
+    games = []
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+
+        data = json.loads(line)
+        if data['event'] == 'start' or not games:
+            games.append([])
+        games[-1].append(data)
+    return games
+
+
+def load(path):
+    """
+    Returns a Replay for each game recorded in a file.
+    """
+    with io.open(path, encoding='utf-8') as stream:
+        return [Replay(events) for events in read_games(stream)]
+
+
+class Replay(object):
+    """
+    Rebuilds the game state from recorded events by repeating
+    the calls the server made, without connections or delays.
+    """
+
+    def __init__(self, events):
+        self.events = events
+
+        # Number of cards played
+        self.plies = sum(1 for data in events if data['event'] == 'play')
+
+    def game(self, ply=None):
+        """
+        Returns the game state directly after `ply` cards were
+        played, or at the end of the record.
+        """
+        game = None
+        for game, data in self.run():
+            if ply is None:
+                continue
+            if data['event'] == 'start' and ply == 0 or data.get('ply') == ply:
+                return game
+        return game
+
+    def run(self):
+        """
+        Yields the game state and event after applying each event.
+        Play events get the number of the ply added.
+        """
+        shuffles = [data['cards'] for data in self.events if data['event'] == 'shuffle']
+        game = Game(ReplayRandom(shuffles))
+        ply = 0
+
+        for data in self.events:
+            event = data['event']
+
+            if event == 'start':
+                for id, name, type in data['players']:
+                    # Keep player ids of the recorded game
+                    game.player_id = id - 1
+                    game.add_player(name, None, type)
+                game.start(data['cards'])
+
+            elif event == 'play':
+                game.play(data['value'], data['source'], data['target'])
+                ply += 1
+                data = dict(data, ply=ply)
+
+            elif event == 'draw':
+                cards = game.draw_cards()
+                if cards != data['cards']:
+                    raise ValueError("Drawn cards do not match record")
+
+            elif event == 'turn':
+                game.next_turn()
+
+            elif event == 'leave':
+                game.remove_player(data['player'])
+
+            elif event == 'end':
+                game.end(data['winner'])
+
+            yield game, data
+
+    def positions(self):
+        """
+        Yields the number of cards played, player id and the cards
+        the player at turn knows about whenever these change, as
+        passed to calculate_move.
+        """
+        ply = 0
+        for game, data in self.run():
+            ply = data.get('ply', ply)
+            if data['event'] in ('start', 'play', 'draw', 'turn') and not game.ended:
+                player = game.get_player(game.turn)
+                if player is None:
+                    continue
+                yield (
+                    ply,
+                    player.id,
+                    player.stock_pile.top,
+                    [pile.cards[:] for pile in player.discard_piles],
+                    player.hand[:],
+                    game.build_cards[:],
+                )
+
@@ -1,20 +1,49 @@
 from threading import Thread
+import multiprocessing
 import random
-import time
+
+try:
+    from concurrent.futures import ProcessPoolExecutor
+except ImportError:
+    # Python 2 without the futures backport
+    ProcessPoolExecutor = None
 
 from sciibo.bot import Bot
+from sciibo.bot.cache import MoveCache
+from sciibo.bot.ponder import SearchGate
 from sciibo.core.emitter import Emitter
 from sciibo.core.helpers import Queue
 from sciibo.network.broadcast import BroadcastThread
 from sciibo.network.connection import ConnectionThread
+from sciibo.network.framing import Frame
 from sciibo.network.listen import ListenThread
+from sciibo.network.reactor import BroadcastHandler, ConnectionHandler, ListenHandler, Reactor, selectors
 from sciibo.network.proxy import ProxyConnections
 
 from .game import Game
+from .record import Recorder
+
+
+def create_executor(workers):
+    """
+    Returns a process pool that starts fresh worker processes.
+
+    Workers start on the first calculation in a bot thread, forking
+    then would copy a process running the server and bot threads.
+    """
+    if hasattr(multiprocessing, 'get_context'):
+        methods = multiprocessing.get_all_start_methods()
+        method = 'forkserver' if 'forkserver' in methods else 'spawn'
+        try:
+            return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+        except TypeError:
+            # Python before 3.7
+            pass
+    return ProcessPoolExecutor(max_workers=workers)
 
 
 class Server(Thread, Emitter):
-    def __init__(self, name, cards=15, local=False):
+    def __init__(self, name, cards=15, local=False, workers=0, cache_size=4096, ponder=False, rng=None, record=None):
         Thread.__init__(self)
         Emitter.__init__(self)
 
@@ -26,14 +55,33 @@ class Server(Thread, Emitter):
         self.local = local
         self.cards = cards
 
-        # Create game state
-        self.game = Game()
+        # Random number generator for the game and bots,
+        # a seeded random.Random instance makes games reproducible
+        self.rng = rng or random
+
+        # Optionally record games to the file at path `record`
+        self.recorder = Recorder.open(record) if record else None
+
+        # Create game state, recording shuffled decks
+        if self.recorder:
+            self.game = Game(self.recorder.random(self.rng))
+        else:
+            self.game = Game(self.rng)
+
+        # Single thread running all sockets, when available
+        self.reactor = None
 
         if not self.local:
             # Binding the port might fail, exception will bubble up
             # before we start any of these threads
-            self.listen = ListenThread()
-            self.broadcast = BroadcastThread()
+            if selectors:
+                self.reactor = Reactor()
+                self.listen = ListenHandler(self.reactor)
+                self.broadcast = BroadcastHandler(self.reactor)
+                self.reactor.start()
+            else:
+                self.listen = ListenThread()
+                self.broadcast = BroadcastThread()
 
             # Listen for incoming connections
             self.listen.on('connect', self.on_connect)
@@ -49,6 +97,19 @@ class Server(Thread, Emitter):
         # Queue of incoming messages to be processed
         self.queue = Queue()
 
+        # Process pool shared by bots to calculate moves in parallel
+        self.executor = None
+        if workers and ProcessPoolExecutor:
+            self.executor = create_executor(workers)
+
+        # Calculated moves shared by bots
+        self.cache = MoveCache(cache_size) if cache_size else None
+
+        # Let bots calculate moves during turns of opponents,
+        # waiting while a bot searches on its turn
+        self.ponder = ponder
+        self.gate = SearchGate() if ponder else None
+
         # Bot clients
         self.bots = []
         self.bot_names = [
@@ -58,20 +119,27 @@ class Server(Thread, Emitter):
             'Daphne',
             'Emily',
         ]
-        random.shuffle(self.bot_names)
+        self.rng.shuffle(self.bot_names)
 
     def stop(self):
         # Thread should be stopped
         self.stopped = True
 
+        # Wake up thread waiting for messages
+        self.queue.put(None)
+
     def run(self):
         while not self.stopped:
-            while not self.queue.empty():
-                conn, data = self.queue.get()
-                self.on_client_message(conn, data)
-                self.queue.task_done()
+            # Wait for next message
+            message = self.queue.get()
+            self.queue.task_done()
+
+            # Woken up by stop
+            if message is None:
+                break
 
-            time.sleep(0.2)
+            conn, data = message
+            self.on_client_message(conn, data)
 
         # Stop networking
         if not self.local:
@@ -86,6 +154,17 @@ class Server(Thread, Emitter):
         for bot in self.bots:
             bot.stop()
 
+        # Stop reactor after closing sockets
+        if self.reactor:
+            self.reactor.stop()
+
+        # Stop worker processes
+        if self.executor:
+            self.executor.shutdown(wait=False)
+
+        if self.recorder:
+            self.recorder.close()
+
     """
     Events
     """
@@ -93,10 +172,11 @@ class Server(Thread, Emitter):
         self.broadcast.send(address, self.name)
 
     def on_connect(self, sock, address):
-        conn = ConnectionThread(sock)
-        conn.on('receive', self.on_client_receive)
-        self.connections.append(conn)
-        conn.start()
+        if self.reactor:
+            conn = ConnectionHandler(self.reactor, sock)
+        else:
+            conn = ConnectionThread(sock)
+        self.add_connection(conn)
 
     def on_client_receive(self, conn, data):
         self.queue.put((conn, data))
@@ -124,6 +204,8 @@ class Server(Thread, Emitter):
 
                 # Remove player from player list
                 self.game.remove_player(player.id)
+                if self.recorder and self.game.started:
+                    self.recorder.leave(player.id)
 
                 # Let interface know (only used in lobby)
                 self.trigger('leave', player.name)
@@ -136,6 +218,8 @@ class Server(Thread, Emitter):
                             'type': 'end',
                         })
                         self.game.end()
+                        if self.recorder:
+                            self.recorder.end()
                         return
 
                     # It was this player's turn
@@ -198,6 +282,8 @@ class Server(Thread, Emitter):
 
             # Perform move
             self.game.play(value, source, target)
+            if self.recorder:
+                self.recorder.play(player.id, value, source, target)
             message = {
                 'type': 'play',
                 'player': player.id,
@@ -218,6 +304,8 @@ class Server(Thread, Emitter):
                     'winner': player.id,
                 })
                 self.game.end(player.id)
+                if self.recorder:
+                    self.recorder.end(player.id)
                 return
 
             # Card was played to build pile
@@ -250,7 +338,9 @@ class Server(Thread, Emitter):
 
         # Add bot
         proxy_server, proxy_client = ProxyConnections()
-        bot = Bot(proxy_client)
+        # Each bot gets its own generator, bot threads run in any order
+        bot_rng = random.Random(self.rng.random())
+        bot = Bot(proxy_client, executor=self.executor, cache=self.cache, ponder=self.ponder, rng=bot_rng, gate=self.gate)
         bot.start()
         self.bots.append(bot)
 
@@ -286,6 +376,8 @@ class Server(Thread, Emitter):
 
             # Remove player from player list
             self.game.remove_player(id)
+            if self.recorder and self.game.started:
+                self.recorder.leave(id)
 
             # Let interface know
             self.trigger('leave', player.name)
@@ -294,6 +386,8 @@ class Server(Thread, Emitter):
         if len(self.game.player_ids) < 2:
             return
 
+        if self.recorder:
+            self.recorder.start(self.game.players, self.cards)
         self.game.start(self.cards)
 
         # Top stock cards in player order
@@ -331,11 +425,23 @@ class Server(Thread, Emitter):
     """
     Helper methods
     """
+    def add_connection(self, conn):
+        """
+        Handles messages of a new client connection, which must
+        have `send`, `start` and `stop` methods, a `player` attribute
+        and trigger 'receive' events, like ConnectionThread.
+        """
+        conn.on('receive', self.on_client_receive)
+        self.connections.append(conn)
+        conn.start()
+
     def send_all(self, data, without=None):
+        # Encode message once for all network players
+        frame = Frame(data)
         for player in self.game.players:
             if player.id == without:
                 continue
-            player.send(data)
+            player.send(frame)
 
     def add_player(self, name, conn, type):
         # Add player to game
@@ -378,6 +484,8 @@ class Server(Thread, Emitter):
     def draw_cards(self):
         cards = self.game.draw_cards()
         player = self.game.get_player(self.game.turn)
+        if self.recorder:
+            self.recorder.draw(player.id, cards)
 
         # Draw pile might be empty
         if cards:
@@ -396,6 +504,8 @@ class Server(Thread, Emitter):
 
     def next_turn(self):
         self.game.next_turn()
+        if self.recorder:
+            self.recorder.turn(self.game.turn)
         self.draw_cards()
 
         # Let everybody know whose turn it is
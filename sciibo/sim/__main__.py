@@ -0,0 +1,57 @@
+import argparse
+import random
+import time
+
+from sciibo.bot.cache import MoveCache
+from sciibo.server.record import Recorder
+
+from .simulator import Policy, Simulator
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m sciibo.sim', description="Simulate games between bots.")
+    parser.add_argument('-n', '--games', type=int, default=100, help="number of games to play")
+    parser.add_argument('-p', '--players', type=int, default=2, help="number of players")
+    parser.add_argument('-c', '--cards', type=int, default=15, help="number of stock cards")
+    parser.add_argument('-t', '--timeout', type=float, default=None, help="maximum seconds to calculate moves")
+    parser.add_argument('-b', '--budget', type=int, default=None, help="maximum positions to expand while calculating moves")
+    parser.add_argument('--beam', type=int, default=None, help="maximum positions kept per number of cards played")
+    parser.add_argument('-s', '--seed', type=int, default=None, help="seed to play the same games again")
+    parser.add_argument('-r', '--record', default=None, help="append games to file, replay with sciibo.server.record")
+    parser.add_argument('--max-turns', type=int, default=1000, help="turns after which a game ends undecided")
+    parser.add_argument('--cache-size', type=int, default=4096, help="number of positions to cache, 0 to disable")
+    args = parser.parse_args()
+
+    cache = MoveCache(args.cache_size) if args.cache_size else None
+    policies = [Policy(timeout=args.timeout, budget=args.budget, beam=args.beam, cache=cache) for n in range(args.players)]
+    rng = random.Random(args.seed) if args.seed is not None else None
+    recorder = Recorder.open(args.record) if args.record else None
+    simulator = Simulator(policies, cards=args.cards, max_turns=args.max_turns, rng=rng, recorder=recorder)
+
+    wins = [0] * args.players
+    undecided = 0
+    turns = 0
+
+    start_time = time.time()
+    for n in range(args.games):
+        result = simulator.play()
+        turns += result.turns
+        if result.winner is None:
+            undecided += 1
+        else:
+            wins[result.winner] += 1
+    duration = time.time() - start_time
+
+    if recorder:
+        recorder.close()
+
+    print("Played %d games in %.1f seconds (%.1f games per minute)" % (
+        args.games, duration, args.games * 60 / max(duration, 1e-9)))
+    print("Average turns: %.1f" % (turns / float(max(args.games, 1))))
+    for n, count in enumerate(wins):
+        print("Player %d wins: %d" % (n + 1, count))
+    print("Undecided: %d" % undecided)
+
+
+if __name__ == '__main__':
+    main()
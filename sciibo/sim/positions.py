@@ -0,0 +1,47 @@
+import argparse
+import json
+import time
+
+from sciibo.bot.ai import calculate_move
+from sciibo.server.record import load
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m sciibo.sim.positions', description="Find slow AI positions in recorded games.")
+    parser.add_argument('path', help="file with recorded games")
+    parser.add_argument('-t', '--threshold', type=float, default=0.5, help="report positions taking more seconds")
+    parser.add_argument('--timeout', type=float, default=None, help="maximum seconds to calculate moves")
+    args = parser.parse_args()
+
+    for number, replay in enumerate(load(args.path)):
+        seen = set()
+        for ply, player, stock, discards, hand, builds in replay.positions():
+            # Hand is empty until cards are drawn
+            if not hand:
+                continue
+
+            # Same position after drawing and at start of turn
+            key = repr((stock, discards, hand, builds))
+            if key in seen:
+                continue
+            seen.add(key)
+
+            start_time = time.time()
+            calculate_move(stock, discards, hand, builds, timeout=args.timeout)
+            duration = time.time() - start_time
+
+            if duration >= args.threshold:
+                print(json.dumps({
+                    'game': number,
+                    'ply': ply,
+                    'player': player,
+                    'seconds': round(duration, 3),
+                    'stock': stock,
+                    'discards': discards,
+                    'hand': hand,
+                    'builds': builds,
+                }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+import random
+import time
+
+from sciibo.bot.ai import calculate_move, lucky_move
+from sciibo.bot.game import Game as BotGame
+from sciibo.bot.plan import Plan
+from sciibo.server.game import Game
+
+
+class Policy(object):
+    """
+    Settings used by a simulated player to calculate moves.
+    """
+
+    def __init__(self, name='default', timeout=None, budget=None, anytime=True, cache=None, beam=None):
+        self.name = name
+
+        # Calculation limits, see calculate_move
+        self.timeout = timeout
+        self.budget = budget
+        self.anytime = anytime
+        self.beam = beam
+
+        # Optional MoveCache
+        self.cache = cache
+
+    def calculate(self, stock, discards, hand, builds, rng=None):
+        return calculate_move(
+            stock,
+            discards,
+            hand,
+            builds,
+            timeout=self.timeout,
+            budget=self.budget,
+            anytime=self.anytime,
+            beam=self.beam,
+            cache=self.cache,
+            rng=rng,
+        )
+
+    def repair(self, plan, view, rng=None):
+        """
+        Repairs a plan after drawing cards, within the calculation limits.
+        """
+        return plan.repair(
+            view,
+            drawn=True,
+            timeout=self.timeout,
+            budget=self.budget,
+            cache=self.cache,
+            rng=rng,
+            beam=self.beam,
+        )
+
+    def __repr__(self):
+        return '<Policy %s timeout=%r budget=%r beam=%r>' % (self.name, self.timeout, self.budget, self.beam)
+
+
+class Result(object):
+    """
+    Outcome of a simulated game.
+
+    Lists hold a value for each player, in order of the policies.
+    """
+
+    def __init__(self, players):
+        # Index of winning player, None when the game is undecided
+        self.winner = None
+
+        # Number of turns played
+        self.turns = 0
+
+        # Number of turns played by each player
+        self.player_turns = [0] * players
+
+        # Number of moves made
+        self.moves = [0] * players
+
+        # Number of cards played from stock pile
+        self.stock = [0] * players
+
+        # Seconds spent calculating moves
+        self.time = [0.0] * players
+
+        # Number of times moves were calculated
+        self.calculations = [0] * players
+
+    def __repr__(self):
+        return '<Result winner=%r turns=%d moves=%r>' % (self.winner, self.turns, self.moves)
+
+
+class Simulator(object):
+    """
+    Plays games between AI players without server, threads or delays.
+
+    Mirrors the rules applied by the server: a turn ends after
+    discarding a card, and five new cards are drawn after emptying
+    the hand. A player without hand cards that can't play any card
+    skips their turn, which the server leaves undecided. Games end
+    without a winner when no player can move or after `max_turns`.
+    """
+
+    def __init__(self, policies=None, cards=15, max_turns=1000, rng=None, recorder=None):
+        # One policy for each player
+        self.policies = policies or [Policy(), Policy()]
+
+        # Number of cards in stock pile
+        self.cards = cards
+
+        # Games taking longer end without a winner
+        self.max_turns = max_turns
+
+        # Random number generator for shuffles and AI choices,
+        # a seeded random.Random instance makes games reproducible
+        self.rng = rng or random
+
+        # Optional Recorder to write games to
+        self.recorder = recorder
+
+    def view(self, player):
+        """
+        Returns the cards a player knows about, as kept by bots.
+        """
+        game = BotGame()
+        game.stock_card = player.stock_pile.top
+        game.discard_piles = [pile.cards[:] for pile in player.discard_piles]
+        game.hand = player.hand[:]
+        game.build_piles = self.game.build_cards[:]
+        return game
+
+    def calculate(self, index, player):
+        """
+        Calculates the next moves of a player.
+        """
+        view = self.view(player)
+        arguments = (view.stock_card, view.discard_piles, view.hand, view.build_piles)
+
+        start_time = time.time()
+        if view.hand:
+            moves = self.policies[index].calculate(*arguments, rng=self.rng)
+        else:
+            # Nothing to discard, play any card possible
+            moves = lucky_move(*arguments)
+        self.result.time[index] += time.time() - start_time
+        self.result.calculations[index] += 1
+
+        return Plan(moves)
+
+    def repair(self, index, player, plan):
+        """
+        Repairs the plan of a player after drawing cards.
+        """
+        start_time = time.time()
+        self.policies[index].repair(plan, self.view(player), rng=self.rng)
+        self.result.time[index] += time.time() - start_time
+
+    def play(self):
+        """
+        Plays a game and returns its Result.
+        """
+        recorder = self.recorder
+        self.game = Game(recorder.random(self.rng) if recorder else self.rng)
+        self.result = Result(len(self.policies))
+
+        for n in range(len(self.policies)):
+            self.game.add_player('Player %d' % (n + 1), None, 'bot')
+        if recorder:
+            recorder.start(self.game.players, self.cards)
+        self.game.start(self.cards)
+
+        # Number of turns in a row without any move
+        idle = 0
+
+        while self.result.turns < self.max_turns:
+            self.result.turns += 1
+            moves = sum(self.result.moves)
+            if self.play_turn():
+                break
+
+            # No player can move anymore
+            idle = 0 if sum(self.result.moves) > moves else idle + 1
+            if idle == len(self.policies):
+                break
+
+        if recorder:
+            winner = self.result.winner
+            recorder.end(None if winner is None else winner + 1)
+
+        return self.result
+
+    def play_turn(self):
+        """
+        Plays moves until the player at turn discards a card.
+        Returns True if the game has ended.
+        """
+        game = self.game
+        player = game.get_player(game.turn)
+        index = player.id - 1
+        plan = Plan()
+        self.result.player_turns[index] += 1
+
+        while True:
+            if not plan:
+                plan = self.calculate(index, player)
+
+                # Player can't do anything
+                if not plan:
+                    break
+
+            value, source, target = plan.pop()
+            if not game.valid_move(value, source, target):
+                raise Exception("AI made invalid move %r" % ((value, source, target),))
+
+            game.play(value, source, target)
+            self.result.moves[index] += 1
+            if self.recorder:
+                self.recorder.play(player.id, value, source, target)
+
+            if source == 'stock':
+                self.result.stock[index] += 1
+
+                if player.stock_pile.empty():
+                    game.end(player.id)
+                    self.result.winner = index
+                    return True
+
+            # Discarding ends the turn
+            if target.startswith('discard'):
+                break
+
+            # Player emptied their hand
+            if not player.hand:
+                self.draw_cards()
+                self.repair(index, player, plan)
+
+        game.next_turn()
+        if self.recorder:
+            self.recorder.turn(game.turn)
+        self.draw_cards()
+        return False
+
+    def draw_cards(self):
+        cards = self.game.draw_cards()
+
+        # Also recorded without cards, drawing may reshuffle
+        if self.recorder:
+            self.recorder.draw(self.game.turn, cards)
@@ -0,0 +1,230 @@
+import argparse
+import math
+import random
+import time
+
+try:
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+except ImportError:
+    # Python 2 without the futures backport
+    ProcessPoolExecutor = None
+
+from .simulator import Policy, Simulator
+
+
+def parse_policy(spec):
+    """
+    Creates a policy from a command line specification.
+
+    Example:
+    > parse_policy('fast:timeout=0.1,budget=500')
+    <Policy fast timeout=0.1 budget=500 beam=None>
+    """
+    name, _, options = spec.partition(':')
+    arguments = {}
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        if key == 'timeout':
+            arguments['timeout'] = float(value)
+        elif key == 'budget':
+            arguments['budget'] = int(value)
+        elif key == 'beam':
+            arguments['beam'] = int(value)
+        elif key == 'anytime':
+            arguments['anytime'] = value.lower() in ('1', 'yes', 'true')
+        else:
+            raise ValueError("Unknown policy option %r" % key)
+    return Policy(name, **arguments)
+
+
+def wilson(wins, games, z=1.96):
+    """
+    Returns the Wilson score interval of a win rate,
+    with a 95% confidence level by default.
+
+    Example:
+    > wilson(60, 100)
+    (0.502..., 0.690...)
+    """
+    if not games:
+        return 0.0, 1.0
+    rate = float(wins) / games
+    denominator = 1 + z * z / games
+    center = (rate + z * z / (2 * games)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / games + z * z / (4 * games * games)) / denominator
+    return max(center - margin, 0.0), min(center + margin, 1.0)
+
+
+def play_game(policies, cards, max_turns, seed, rotation):
+    """
+    Plays a single seeded game with the policies rotated over the seats.
+    Returns the seed, rotation and Result of the game.
+    """
+    seated = policies[rotation:] + policies[:rotation]
+    result = Simulator(seated, cards=cards, max_turns=max_turns, rng=random.Random(seed)).play()
+    return seed, rotation, result
+
+
+class Standing(object):
+    """
+    Statistics of a policy over all games played.
+    """
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.games = 0
+        self.wins = 0
+        self.turns = 0
+        self.player_turns = 0
+        self.moves = 0
+        self.stock = 0
+        self.time = 0.0
+
+    @property
+    def win_rate(self):
+        return float(self.wins) / self.games if self.games else 0.0
+
+    @property
+    def interval(self):
+        return wilson(self.wins, self.games)
+
+    @property
+    def average_turns(self):
+        """
+        Average number of turns per game, of all players.
+        """
+        return float(self.turns) / self.games if self.games else 0.0
+
+    @property
+    def stock_speed(self):
+        """
+        Average number of stock cards played per own turn.
+        """
+        return float(self.stock) / self.player_turns if self.player_turns else 0.0
+
+    @property
+    def time_per_move(self):
+        """
+        Average seconds spent calculating per move made.
+        """
+        return self.time / self.moves if self.moves else 0.0
+
+    def __repr__(self):
+        low, high = self.interval
+        return '<Standing %s wins=%d/%d (%.3f-%.3f)>' % (self.policy.name, self.wins, self.games, low, high)
+
+
+class Tournament(object):
+    """
+    Plays seeded games between policies, in parallel when workers are given.
+
+    Seats are rotated between games so no policy benefits from
+    its position. Each game is seeded with `seed` plus its number,
+    so tournaments can be repeated.
+    """
+
+    def __init__(self, policies, games=100, cards=15, max_turns=1000, seed=0, workers=0):
+        self.policies = policies
+        self.games = games
+        self.cards = cards
+        self.max_turns = max_turns
+        self.seed = seed
+        self.workers = workers
+
+        # Statistics by policy, in order of the policies
+        self.standings = [Standing(policy) for policy in policies]
+
+        # Games without a winner
+        self.undecided = 0
+
+        # Number of games finished
+        self.played = 0
+
+    def tasks(self):
+        for n in range(self.games):
+            yield self.policies, self.cards, self.max_turns, self.seed + n, n % len(self.policies)
+
+    def results(self):
+        """
+        Yields the seed, rotation and Result of each game as they finish.
+        """
+        if self.workers and ProcessPoolExecutor:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(play_game, *task) for task in self.tasks()]
+                for future in as_completed(futures):
+                    yield future.result()
+        else:
+            for task in self.tasks():
+                yield play_game(*task)
+
+    def add(self, rotation, result):
+        """
+        Adds the result of a game to the standings.
+        """
+        self.played += 1
+        if result.winner is None:
+            self.undecided += 1
+
+        for seat in range(len(self.policies)):
+            standing = self.standings[(seat + rotation) % len(self.policies)]
+            standing.games += 1
+            standing.wins += result.winner == seat
+            standing.turns += result.turns
+            standing.player_turns += result.player_turns[seat]
+            standing.moves += result.moves[seat]
+            standing.stock += result.stock[seat]
+            standing.time += result.time[seat]
+
+    def run(self):
+        """
+        Plays all games, yielding the number of games finished after each.
+        """
+        for seed, rotation, result in self.results():
+            self.add(rotation, result)
+            yield self.played
+
+    def report(self):
+        lines = ['%-12s %6s %7s %15s %7s %7s %9s' % (
+            'Policy', 'Games', 'Win %', '95% interval', 'Turns', 'Stock', 'ms/move')]
+        for standing in self.standings:
+            low, high = standing.interval
+            lines.append('%-12s %6d %7.1f %7.1f - %5.1f %7.1f %7.3f %9.3f' % (
+                standing.policy.name,
+                standing.games,
+                standing.win_rate * 100,
+                low * 100,
+                high * 100,
+                standing.average_turns,
+                standing.stock_speed,
+                standing.time_per_move * 1000,
+            ))
+        lines.append('Undecided: %d' % self.undecided)
+        return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m sciibo.sim.tournament', description="Play a tournament between bot policies.")
+    parser.add_argument('policies', nargs='*', metavar='POLICY', help="policy as name:timeout=SECONDS,budget=NODES,beam=WIDTH, defaults to two unlimited policies")
+    parser.add_argument('-n', '--games', type=int, default=100, help="number of games to play")
+    parser.add_argument('-c', '--cards', type=int, default=15, help="number of stock cards")
+    parser.add_argument('-s', '--seed', type=int, default=0, help="seed of the first game")
+    parser.add_argument('-w', '--workers', type=int, default=0, help="number of worker processes, 0 to play in this process")
+    parser.add_argument('--max-turns', type=int, default=1000, help="turns after which a game ends undecided")
+    parser.add_argument('--progress', type=int, default=100, help="print standings every number of games, 0 to disable")
+    args = parser.parse_args()
+
+    policies = [parse_policy(spec) for spec in args.policies] or [Policy('a'), Policy('b')]
+    tournament = Tournament(policies, games=args.games, cards=args.cards, max_turns=args.max_turns, seed=args.seed, workers=args.workers)
+
+    start_time = time.time()
+    for played in tournament.run():
+        if args.progress and played % args.progress == 0 and played < args.games:
+            print("%d/%d games played\n%s\n" % (played, args.games, tournament.report()))
+    duration = time.time() - start_time
+
+    print("Played %d games in %.1f seconds" % (tournament.played, duration))
+    print(tournament.report())
+
+
+if __name__ == '__main__':
+    main()
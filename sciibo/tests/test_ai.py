@@ -1,6 +1,8 @@
+import random
 import unittest
 
 from sciibo.bot import ai
+from sciibo.bot.position import Position, decode_hand
 from sciibo.core.helpers import nextcard, fitson
 
 
@@ -259,7 +261,14 @@ class TestAI(unittest.TestCase):
         }
         self.assertEqual(ai.discard_move(**values), [('SB', 'hand', 'discard:2')])
 
-        # Falls back to random choice, kind of difficult to test
+        # Falls back to random choice, same choice with same seed
+        values = {
+            'discards': [[8], ['SB'], [1], [12]],
+            'hand': [4, 5, 6, 'SB'],
+        }
+        result = ai.discard_move(rng=random.Random(5), **values)
+        for n in range(10):
+            self.assertEqual(ai.discard_move(rng=random.Random(5), **values), result)
 
     """
     Any move
@@ -344,6 +353,45 @@ class TestAI(unittest.TestCase):
         result = ai.stock_moves(**values)
         self.assertEqual(result, expected)
 
+    def test_stock_distance(self):
+        self.assertEqual(ai.stock_distance(5, [1, 2, 10, 12]), 2)
+        self.assertEqual(ai.stock_distance(1, [11, 12, 12, 12]), 0)
+        self.assertEqual(ai.stock_distance(1, [1, 2, 3, 4]), 8)
+
+    def test_stock_best_first(self):
+        # Best-first search gives the same results as breadth-first search
+        positions = [
+            {
+                'stock': 1,
+                'discards': [[12, 3], [7], [2], []],
+                'hand': [3, 9, 7, 10],
+                'builds': [11, 1, 6, 9],
+            },
+            {
+                'stock': 7,
+                'discards': [[9], [], [], []],
+                'hand': [10, 'SB', 6],
+                'builds': [10, 2, 2, 1],
+            },
+            {
+                'stock': 6,
+                'discards': [[6], [7], [], []],
+                'hand': [8, 7, 12, 9, 'SB'],
+                'builds': [3, 12, 12, 12],
+            },
+            {
+                'stock': 9,
+                'discards': [[7, 6, 5, 4, 2], [11, 11, 9, 8, 6], [11], [10]],
+                'hand': ['SB', 'SB', 'SB', 3, 'SB'],
+                'builds': [1, 2, 3, 4],
+            },
+        ]
+        for values in positions:
+            expected = ai.stock_moves(best_first=False, **values)
+            stats = ai.SearchStats()
+            result = ai.stock_moves(stats=stats, **values)
+            self.assertEqual(result, expected)
+
     """
     Most moves
     """
@@ -439,6 +487,81 @@ class TestAI(unittest.TestCase):
         result = ai.most_moves(**values)
         self.assertEqual(result, expected)
 
+    def test_most_transpositions(self):
+        # Positions reached by playing cards in another order are expanded once
+        values = {
+            'discards': [[6], [], [], []],
+            'hand': [2, 5],
+            'builds': [1, 4, 12, 12],
+        }
+        stats = ai.SearchStats()
+        result = ai.most_moves(stats=stats, **values)
+        self.assertEqual(len(result), 3)
+        self.assertGreater(stats.duplicates, 0)
+
+    def test_position(self):
+        # Order of hand cards does not matter
+        self.assertEqual(
+            Position.create([[1, 2], [], [], []], [5, 'SB', 3], [1, 2, 3, 4]),
+            Position.create([[1, 2], [], [], []], [3, 5, 'SB'], [1, 2, 3, 4]),
+        )
+        self.assertNotEqual(
+            Position.create([[1, 2], [], [], []], [5, 'SB', 3], [1, 2, 3, 4]),
+            Position.create([[2, 1], [], [], []], [5, 'SB', 3], [1, 2, 3, 4]),
+        )
+
+    def test_position_symmetric_key(self):
+        # Swapped build piles and swapped discard piles are the same
+        position = Position.create([[1, 'SB'], [], [4], []], [5, 'SB', 3], [1, 2, 3, 4])
+        swapped = Position.create([[4], [1, 'SB'], [], []], [5, 'SB', 3], [4, 3, 1, 2])
+        self.assertEqual(position.symmetric_key(), swapped.symmetric_key())
+
+        # SB on top of build pile stays with the build pile
+        self.assertEqual(position.symmetric_key(0b0001), swapped.symmetric_key(0b0100))
+        self.assertNotEqual(position.symmetric_key(0b0001), swapped.symmetric_key(0b0001))
+
+    def test_position_play(self):
+        position = Position.create([[1, 2], [], [], []], [5, 'SB', 5], [1, 2, 3, 4])
+        self.assertEqual(list(position.hand_cards()), ['SB', 5])
+        self.assertEqual(list(position.top_cards()), [(0, 2)])
+
+        result = position.play_hand(5, 3).play_discard(0, 0)
+        expected = Position.create([[1], [], [], []], ['SB', 5], [2, 2, 3, 5])
+        self.assertEqual(result, expected)
+        self.assertEqual(decode_hand(result.hand), ['SB', 5])
+
+    def test_most_parallel(self):
+        # Searching first moves in parallel gives the same results
+        try:
+            from concurrent.futures import ProcessPoolExecutor
+        except ImportError:
+            self.skipTest("concurrent.futures not available")
+        executor = ProcessPoolExecutor(max_workers=2)
+        positions = [
+            {
+                'discards': [['SB'], [6], [7], [8]],
+                'hand': [6, 8],
+                'builds': [1, 5, 12, 12],
+            },
+            {
+                'discards': [[], [], [], []],
+                'hand': [6, 7, 8, 'SB', 2],
+                'builds': [5, 12, 12, 12],
+            },
+            {
+                'discards': [[7, 6, 5, 4, 2], [11, 11, 9, 8, 6], [11], [10]],
+                'hand': ['SB', 'SB', 'SB', 'SB', 'SB'],
+                'builds': [1, 2, 3, 4],
+            },
+        ]
+        try:
+            for values in positions:
+                expected = ai.most_moves(**values)
+                result = ai.most_moves(executor=executor, **values)
+                self.assertEqual(result, expected)
+        finally:
+            executor.shutdown()
+
     """
     Calculate moves
     """
@@ -450,11 +573,102 @@ class TestAI(unittest.TestCase):
             'hand': ['SB', 'SB', 'SB', 'SB', 'SB'],
             'builds': [1, 2, 3, 4],
         }
+        expected = ai.most_moves(values['discards'], values['hand'], values['builds'])
+        result = ai.calculate_move(timeout=5, **values)
+        self.assertEqual(result, expected)
+
+    def test_calculate_timeout(self):
+        # Fall back to any possible move when calculation takes too long
+        values = {
+            'stock': 26,
+            'discards': [[7, 6, 5, 4, 2], [11, 11, 9, 8, 6], [11], [10]],
+            'hand': ['SB', 'SB', 'SB', 'SB', 'SB'],
+            'builds': [1, 2, 3, 4],
+        }
         expected = [
             (2, 'discard:0', 'build:0'),
         ]
-        result = ai.calculate_move(timeout=1, **values)
+        stats = ai.SearchStats()
+        result = ai.calculate_move(timeout=1e-9, stats=stats, **values)
         self.assertEqual(result, expected)
+        self.assertEqual(stats.fallbacks, 1)
+        self.assertEqual(stats.fallback, 'lucky')
+
+    def test_calculate_stats(self):
+        values = {
+            'stock': 9,
+            'discards': [[12, 3], [7], [2], []],
+            'hand': [3, 9, 7, 10, 'SB'],
+            'builds': [11, 1, 6, 9],
+        }
+        stats = ai.SearchStats()
+        ai.calculate_move(stats=stats, **values)
+        self.assertGreater(stats.expanded, 0)
+        self.assertGreaterEqual(stats.generated, stats.expanded)
+        self.assertGreater(stats.frontier, 0)
+        self.assertGreater(stats.stock_time + stats.most_time, 0)
+        self.assertEqual(stats.fallbacks, 0)
+        self.assertEqual(stats.fallback, None)
+
+    def test_calculate_anytime(self):
+        # Play the best moves found so far when calculation takes too long
+        values = {
+            'stock': 26,
+            'discards': [[7, 6, 5, 4, 2], [11, 11, 9, 8, 6], [11], [10]],
+            'hand': ['SB', 'SB', 'SB', 'SB', 'SB'],
+            'builds': [1, 2, 3, 4],
+        }
+        result = ai.calculate_move(timeout=0.05, anytime=True, **values)
+        self.assertGreater(len(result), 1)
+        for value, source, target in result:
+            self.assertTrue(target.startswith('build:'))
+
+    def test_calculate_budget(self):
+        # Node budget gives the same moves every time
+        values = {
+            'stock': 26,
+            'discards': [[7, 6, 5, 4, 2], [11, 11, 9, 8, 6], [11], [10]],
+            'hand': ['SB', 'SB', 'SB', 'SB', 'SB'],
+            'builds': [1, 2, 3, 4],
+        }
+        stats = ai.SearchStats()
+        result = ai.calculate_move(budget=2000, anytime=True, stats=stats, **values)
+        self.assertGreater(len(result), 1)
+        self.assertLessEqual(stats.expanded, 2000)
+        self.assertEqual(ai.calculate_move(budget=2000, anytime=True, **values), result)
+
+        # Larger budget finds at least as many moves
+        larger = ai.calculate_move(budget=8000, anytime=True, **values)
+        self.assertGreaterEqual(len(larger), len(result))
+
+    def test_most_budget(self):
+        values = {
+            'discards': [[7, 6, 5, 4, 2], [11, 11, 9, 8, 6], [11], [10]],
+            'hand': ['SB', 'SB', 'SB', 'SB', 'SB'],
+            'builds': [1, 2, 3, 4],
+        }
+        with self.assertRaises(ai.CalculationTimeout):
+            ai.most_moves(budget=100, **values)
+
+    def test_most_beam(self):
+        values = {
+            'discards': [[12, 10, 8, 6, 4, 2], [11, 9, 7, 5, 3, 1], ['SB', 12, 6], [5, 'SB']],
+            'hand': ['SB', 'SB', 'SB', 1, 2],
+            'builds': [12, 12, 12, 12],
+        }
+        stats = ai.SearchStats()
+        expected = ai.most_moves(stats=stats, **values)
+
+        # Wide beam drops no positions
+        self.assertEqual(ai.most_moves(beam=stats.frontier, **values), expected)
+
+        # Narrow beam keeps few positions, still finds valid moves
+        beam_stats = ai.SearchStats()
+        result = ai.most_moves(beam=10, stats=beam_stats, **values)
+        self.assertTrue(result)
+        self.assertLessEqual(len(result), len(expected))
+        self.assertLess(beam_stats.frontier, stats.frontier)
+        self.assertLess(beam_stats.expanded, stats.expanded)
 
     """
     Specific bugs
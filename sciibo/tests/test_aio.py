@@ -0,0 +1,88 @@
+from threading import Thread
+import time
+import unittest
+
+try:
+    import asyncio
+    from sciibo.network.aio import connect, serve
+except (ImportError, SyntaxError):
+    # Python 2
+    asyncio = None
+
+from sciibo.client.client import Client
+from sciibo.server import Server
+
+
+@unittest.skipIf(asyncio is None, "asyncio not available")
+class TestAsyncConnection(unittest.TestCase):
+    def setUp(self):
+        # Event loop runs in its own thread, like an embedding application
+        self.loop = asyncio.new_event_loop()
+        self.thread = Thread(target=self.loop.run_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.server = Server('test', local=True)
+        self.server.start()
+        self.listener = self.run_async(serve(self.server, '127.0.0.1', 0))
+        self.port = self.listener.sockets[0].getsockname()[1]
+
+    def tearDown(self):
+        self.server.stop()
+        self.server.join(1)
+        self.listener.close()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(1)
+        self.loop.close()
+
+    def run_async(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(2)
+
+    def join(self, name):
+        client = Client(self.run_async(connect('127.0.0.1', self.port)))
+        events = []
+        client.on('welcome', lambda: events.append('welcome'))
+        client.on('join', lambda player: events.append(player.name))
+        client.on('leave', lambda player: events.append('leave'))
+        client.on('disconnect', lambda: events.append('disconnect'))
+        client.join(name)
+        return client, events
+
+    def process(self, client, events, count):
+        start_time = time.time()
+        while len(events) < count and time.time() - start_time < 2:
+            client.process_message()
+            time.sleep(0.01)
+
+    def test_join(self):
+        anna, anna_events = self.join('Anna')
+        self.process(anna, anna_events, 1)
+        self.assertEqual(anna_events, ['welcome'])
+        self.assertEqual(anna.game.get_player(anna.game.player_id).name, 'Anna')
+
+        bert, bert_events = self.join('Bert')
+        self.process(bert, bert_events, 1)
+        self.process(anna, anna_events, 2)
+        self.assertEqual(bert_events, ['welcome'])
+        self.assertEqual(anna_events, ['welcome', 'Bert'])
+
+        # Server sees the disconnect and tells the other players
+        bert.stop()
+        self.process(anna, anna_events, 3)
+        self.assertEqual(anna_events, ['welcome', 'Bert', 'leave'])
+        anna.stop()
+
+    def test_disconnect(self):
+        anna, anna_events = self.join('Anna')
+        self.process(anna, anna_events, 1)
+
+        # Stopping the server closes client connections
+        self.server.stop()
+        self.server.join(1)
+
+        self.process(anna, anna_events, 2)
+        self.assertEqual(anna_events, ['welcome', 'disconnect'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import copy
+import unittest
+
+from sciibo.bench import compare, corpus, run
+from sciibo.bench.corpus import WORST_CASES, sample_positions
+
+
+class TestBench(unittest.TestCase):
+    def test_corpus(self):
+        positions = corpus(samples=3, seed=1)
+        self.assertEqual(len(positions), len(WORST_CASES) + 3)
+        self.assertEqual(positions[-1]['name'], 'sampled-2')
+
+        # Same seed gives same positions
+        self.assertEqual(sample_positions(3, seed=1), positions[-3:])
+
+    def test_run(self):
+        positions = [position for position in WORST_CASES if position['name'] == 'unreachable-stock']
+        results = run(positions, repeat=1)
+
+        total = results['functions']['calculate_move']['total']
+        self.assertGreater(total['expanded'], 0)
+        self.assertGreater(total['frontier'], 0)
+        self.assertIn('unreachable-stock', results['functions']['most_moves']['positions'])
+
+        # No regressions compared to itself
+        self.assertEqual(compare(results, results), [])
+
+        # More positions expanded
+        slower = copy.deepcopy(results)
+        slower['functions']['most_moves']['positions']['unreachable-stock']['expanded'] *= 2
+        regressions = compare(results, slower)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('most_moves unreachable-stock', regressions[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
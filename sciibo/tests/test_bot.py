@@ -0,0 +1,41 @@
+import random
+import time
+import unittest
+
+from sciibo.bot import Bot
+from sciibo.network.proxy import ProxyConnections
+from sciibo.server import Server
+
+
+class TestBot(unittest.TestCase):
+    def test_stop(self):
+        proxy_server, proxy_client = ProxyConnections()
+        bot = Bot(proxy_client)
+        bot.start()
+
+        # Waiting for messages, woken up by stop
+        bot.stop()
+        bot.join(1)
+        self.assertFalse(bot.is_alive())
+
+    def test_local_game(self):
+        server = Server('test', cards=5, local=True, rng=random.Random(1))
+        server.start()
+        server.add_bot()
+        server.add_bot()
+        for bot in server.bots:
+            bot.think_time = 0
+
+        server.start_game()
+        start_time = time.time()
+        while not server.game.ended and time.time() - start_time < 10:
+            time.sleep(0.01)
+
+        server.stop()
+        server.join(1)
+        self.assertTrue(server.game.ended)
+        self.assertFalse(server.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
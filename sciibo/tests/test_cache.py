@@ -0,0 +1,80 @@
+from threading import Event
+import unittest
+
+from sciibo.bot import ai
+from sciibo.bot.cache import MoveCache
+
+
+class TestCache(unittest.TestCase):
+    def test_get_put(self):
+        cache = MoveCache(size=2)
+        self.assertEqual(cache.get('a'), None)
+
+        cache.put('a', [(1, 'hand', 'build:0')])
+        cache.put('b', None)
+        self.assertEqual(cache.get('a'), [(1, 'hand', 'build:0')])
+        self.assertEqual(cache.get('b'), [])
+
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 1)
+
+    def test_evict_least_recently_used(self):
+        cache = MoveCache(size=2)
+        cache.put('a', [(1, 'hand', 'build:0')])
+        cache.put('b', [(2, 'hand', 'build:0')])
+
+        # Use 'a' so 'b' is evicted
+        cache.get('a')
+        cache.put('c', [(3, 'hand', 'build:0')])
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), [(1, 'hand', 'build:0')])
+
+    def test_returns_copy(self):
+        cache = MoveCache()
+        cache.put('a', [(1, 'hand', 'build:0')])
+        cache.get('a').pop(0)
+        self.assertEqual(cache.get('a'), [(1, 'hand', 'build:0')])
+
+    def test_calculate_move(self):
+        cache = MoveCache()
+        values = {
+            'stock': 1,
+            'discards': [[12, 3], [7], [2], []],
+            'hand': [3, 9, 7, 10],
+            'builds': [11, 1, 6, 9],
+        }
+        expected = ai.calculate_move(**values)
+        self.assertEqual(ai.calculate_move(cache=cache, **values), expected)
+        self.assertEqual(cache.misses, 1)
+
+        # Same position with hand cards in another order
+        values['hand'] = [10, 9, 7, 3]
+        self.assertEqual(ai.calculate_move(cache=cache, **values), expected)
+        self.assertEqual(cache.hits, 1)
+
+    def test_sb_stock_stopped(self):
+        # Pile choice made without completing the searches isn't stored
+        cache = MoveCache()
+        values = {
+            'stock': 'SB',
+            'discards': [[9, 8, 7], [6, 5, 4], [3, 2], ['SB', 1]],
+            'hand': ['SB', 'SB', 10, 11, 1],
+            'builds': [12, 3, 6, 9],
+        }
+        cancel = Event()
+        cancel.set()
+        ai.stock_moves(cache=cache, cancel=cancel, **values)
+        ai.stock_moves(cache=cache, budget=4, **values)
+        self.assertEqual(len(cache), 0)
+
+        # Complete search is stored
+        moves = ai.stock_moves(cache=cache, **values)
+        self.assertNotEqual(moves, [('SB', 'stock', 'build:0')])
+        self.assertEqual(len(cache), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
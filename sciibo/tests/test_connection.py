@@ -0,0 +1,101 @@
+import os
+import socket
+import sys
+import time
+import unittest
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+from sciibo.core.helpers import Queue
+from sciibo.network.connection import ConnectionThread
+from sciibo.network.framing import FrameBuffer, encode
+
+
+class TestConnectionThread(unittest.TestCase):
+    def setUp(self):
+        self.peer, sock = socket.socketpair()
+        self.received = Queue()
+        self.conn = ConnectionThread(sock, limit=100000)
+        self.conn.on('receive', lambda conn, data: self.received.put(data))
+        self.conn.start()
+
+    def tearDown(self):
+        self.conn.stop()
+        self.conn.join(2)
+        self.peer.close()
+
+    def read_messages(self, count):
+        frames = FrameBuffer()
+        messages = []
+        self.peer.settimeout(2)
+        while len(messages) < count:
+            if not frames.recv_into(self.peer):
+                break
+            messages.extend(frames.messages())
+        return messages
+
+    def test_receive(self):
+        self.peer.sendall(encode({'type': 'join', 'name': 'Anna'}) + encode({'type': 'play', 'value': 1}))
+        self.assertEqual(self.received.get(timeout=2), {'type': 'join', 'name': 'Anna'})
+        self.assertEqual(self.received.get(timeout=2), {'type': 'play', 'value': 1})
+
+    def test_send_while_receiving(self):
+        # Half a message received doesn't hold up sending
+        self.peer.sendall(encode({'type': 'join', 'name': 'Anna'})[:10])
+        self.conn.send({'type': 'welcome', 'id': 1})
+        self.assertEqual(self.read_messages(1), [{'type': 'welcome', 'id': 1}])
+
+    def test_send(self):
+        for n in range(100):
+            self.conn.send({'type': 'turn', 'player': n})
+        self.assertEqual(self.read_messages(100), [{'type': 'turn', 'player': n} for n in range(100)])
+
+    def test_slow_reader(self):
+        # Peer doesn't read, sending doesn't block but disconnects
+        start_time = time.time()
+        cards = list(range(2000))
+        for n in range(1000):
+            self.conn.send({'type': 'hand', 'cards': cards})
+            if self.conn.dropped:
+                break
+        self.assertTrue(self.conn.dropped)
+        self.assertLess(time.time() - start_time, 2)
+        self.assertEqual(self.received.get(timeout=2), {'type': 'disconnect'})
+
+    def test_stop(self):
+        # Queued messages are sent before closing
+        self.conn.send({'type': 'kick'})
+        self.conn.stop()
+        self.assertEqual(self.read_messages(2), [{'type': 'kick'}])
+
+
+@unittest.skipIf(sys.version_info < (3,), "sockets can't be created from a descriptor")
+@unittest.skipIf(resource is None or resource.getrlimit(resource.RLIMIT_NOFILE)[0] <= 2000, "file descriptor limit too low")
+class TestHighFileDescriptor(unittest.TestCase):
+    def test_send(self):
+        # Writer doesn't depend on select, which fails on these descriptors
+        peer, sock = socket.socketpair()
+        high = os.dup2(sock.fileno(), 2000) or 2000
+        sock.close()
+        conn = ConnectionThread(socket.socket(fileno=high))
+        conn.start()
+        try:
+            conn.send({'type': 'turn', 'player': 1})
+            peer.settimeout(2)
+            frames = FrameBuffer()
+            messages = []
+            while not messages and frames.recv_into(peer):
+                messages = list(frames.messages())
+            self.assertEqual(messages, [{'type': 'turn', 'player': 1}])
+        finally:
+            conn.stop()
+            conn.join(2)
+            peer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
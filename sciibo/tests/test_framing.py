@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import socket
+import unittest
+
+from sciibo.network.framing import Frame, FrameBuffer, HEADER, encode
+from sciibo.network.proxy import ProxyConnections
+
+
+class TestFrameBuffer(unittest.TestCase):
+    def setUp(self):
+        self.sender, self.receiver = socket.socketpair()
+
+    def tearDown(self):
+        self.sender.close()
+        self.receiver.close()
+
+    def receive(self, frames, data):
+        self.sender.sendall(data)
+        received = 0
+        while received < len(data):
+            received += frames.recv_into(self.receiver)
+        return list(frames.messages())
+
+    def test_several_messages(self):
+        frames = FrameBuffer()
+        data = encode({'type': 'turn', 'player': 1}) + encode({'type': 'turn', 'player': 2})
+        self.assertEqual(self.receive(frames, data), [
+            {'type': 'turn', 'player': 1},
+            {'type': 'turn', 'player': 2},
+        ])
+        self.assertEqual(len(frames), 0)
+
+    def test_split_message(self):
+        # Split inside the header and inside a multibyte character
+        frames = FrameBuffer()
+        data = encode({'type': 'join', 'name': u'Zoë'})
+        self.assertEqual(self.receive(frames, data[:2]), [])
+        self.assertEqual(self.receive(frames, data[2:-4]), [])
+        self.assertEqual(self.receive(frames, data[-4:]), [{'type': 'join', 'name': u'Zoë'}])
+
+    def test_large_message(self):
+        frames = FrameBuffer(16)
+        cards = list(range(1000))
+        data = encode({'type': 'hand', 'cards': cards})
+        self.sender.sendall(data)
+        messages = []
+        while not messages:
+            frames.recv_into(self.receiver)
+            messages = list(frames.messages())
+        self.assertEqual(messages, [{'type': 'hand', 'cards': cards}])
+
+    def test_compact(self):
+        # Buffer is reused when messages end at arbitrary offsets
+        frames = FrameBuffer(80)
+        data = encode({'type': 'turn', 'player': 1})
+        self.assertEqual(self.receive(frames, data + data[:5]), [{'type': 'turn', 'player': 1}])
+        self.assertEqual(self.receive(frames, data[5:] + data), [{'type': 'turn', 'player': 1}] * 2)
+        self.assertEqual(len(frames.buffer), 80)
+
+    def test_invalid(self):
+        frames = FrameBuffer()
+        data = HEADER.pack(4) + b'null' + HEADER.pack(2) + b'{}' + encode({'type': 'play'})
+        self.assertEqual(self.receive(frames, data), [{'type': 'play'}])
+
+        with self.assertRaises(ValueError):
+            self.receive(frames, HEADER.pack(-1))
+
+    def test_too_large(self):
+        # Header alone is rejected, before growing the buffer
+        frames = FrameBuffer(16, max_message=1000)
+        with self.assertRaises(ValueError):
+            self.receive(frames, HEADER.pack(2 ** 31 - 1))
+        self.assertEqual(len(frames.buffer), 16)
+
+
+class TestFrame(unittest.TestCase):
+    def test_encode_once(self):
+        frame = Frame({'type': 'turn', 'player': 1})
+        message = encode(frame)
+        self.assertEqual(message, encode({'type': 'turn', 'player': 1}))
+        self.assertIs(encode(frame), message)
+
+    def test_proxy(self):
+        # Proxy connections receive the message itself
+        received = []
+        proxy_server, proxy_client = ProxyConnections()
+        proxy_client.on('receive', lambda conn, data: received.append(data))
+        proxy_server.send(Frame({'type': 'turn', 'player': 1}))
+        self.assertEqual(received, [{'type': 'turn', 'player': 1}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import random
+import unittest
+
+from sciibo.server.game import Game, Pile
+
+
+def start_game(rng):
+    game = Game(rng)
+    game.add_player('Anna', None, 'bot')
+    game.add_player('Becca', None, 'bot')
+    game.start(15)
+    return game
+
+
+class TestGame(unittest.TestCase):
+    def test_fulldeck(self):
+        first = Pile.fulldeck(random.Random(1))
+        second = Pile.fulldeck(random.Random(1))
+        self.assertEqual(len(first), 162)
+        self.assertEqual(first.cards, second.cards)
+
+    def test_seeded(self):
+        first = start_game(random.Random(2))
+        second = start_game(random.Random(2))
+        self.assertEqual(first.turn, second.turn)
+        self.assertEqual(first.draw_pile.cards, second.draw_pile.cards)
+        for a, b in zip(first.players, second.players):
+            self.assertEqual(a.hand, b.hand)
+            self.assertEqual(a.stock_pile.cards, b.stock_pile.cards)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from sciibo.bot.game import Game
+from sciibo.bot.plan import Plan
+
+
+def create_game(stock, discards, hand, builds):
+    game = Game()
+    game.stock_card = stock
+    game.discard_piles = discards
+    game.hand = hand
+    game.build_piles = builds
+    return game
+
+
+class TestPlan(unittest.TestCase):
+    def test_valid(self):
+        game = create_game(3, [[5], [], [], []], [1, 'SB', 6], [12, 12, 4, 12])
+        plan = Plan([
+            (1, 'hand', 'build:0'),
+            ('SB', 'hand', 'build:0'),
+            (3, 'stock', 'build:0'),
+            (5, 'discard:0', 'build:2'),
+            (6, 'hand', 'build:2'),
+        ])
+        self.assertTrue(plan.valid(game))
+        self.assertTrue(plan.stock)
+
+    def test_invalid(self):
+        game = create_game(3, [[5], [], [], []], [1, 2], [12, 12, 12, 12])
+
+        # Card not in hand
+        self.assertFalse(Plan([(4, 'hand', 'build:0')]).valid(game))
+
+        # Card does not fit on build pile
+        self.assertFalse(Plan([(2, 'hand', 'build:0')]).valid(game))
+
+        # Card no longer on top of discard pile
+        self.assertFalse(Plan([(2, 'hand', 'discard:0'), (5, 'discard:0', 'build:0')]).valid(game))
+
+        # Only hand cards can be discarded
+        self.assertFalse(Plan([(3, 'stock', 'discard:1')]).valid(game))
+
+    def test_repair(self):
+        game = create_game(9, [[5], [], [], []], [1, 2, 3, 4, 7], [12, 12, 12, 12])
+        plan = Plan([(1, 'hand', 'build:0'), (2, 'hand', 'build:0')])
+        self.assertTrue(plan.repair(game))
+        self.assertEqual(len(plan), 2)
+
+        # Moves playing the most cards are extended after drawing
+        self.assertTrue(plan.repair(game, drawn=True))
+        self.assertEqual(plan.moves, [
+            (1, 'hand', 'build:0'),
+            (2, 'hand', 'build:0'),
+            (3, 'hand', 'build:0'),
+            (4, 'hand', 'build:0'),
+            (5, 'discard:0', 'build:0'),
+        ])
+
+    def test_repair_drawn_stock(self):
+        # New cards get rid of the stock card
+        game = create_game(3, [[9], [], [], []], [1, 2, 5, 7, 8], [12, 12, 12, 12])
+        plan = Plan([(9, 'discard:0', 'build:0')])
+        game.build_piles = [8, 12, 12, 12]
+        self.assertTrue(plan.repair(game, drawn=True))
+        self.assertTrue(plan.stock)
+        self.assertEqual(plan.moves[-1], (3, 'stock', 'build:1'))
+
+    def test_repair_stock(self):
+        game = create_game(2, [[], [], [], []], [1, 'SB', 5, 6, 7], [12, 12, 12, 12])
+        plan = Plan([(1, 'hand', 'build:0'), (2, 'stock', 'build:0')])
+
+        # Moves getting rid of the stock card are kept after drawing
+        self.assertTrue(plan.repair(game, drawn=True))
+        self.assertEqual(len(plan), 2)
+
+        # Build pile changed
+        game.build_piles = [5, 12, 12, 12]
+        self.assertFalse(plan.repair(game))
+        self.assertFalse(plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
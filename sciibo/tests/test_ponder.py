@@ -0,0 +1,101 @@
+from threading import Event
+import unittest
+
+from sciibo.bot import ai
+from sciibo.bot.cache import MoveCache
+from sciibo.bot.ponder import Interrupt, Ponderer, SearchGate, likely_hands
+
+
+class TestPonder(unittest.TestCase):
+    def test_likely_hands(self):
+        hands = list(likely_hands([1, 2, 3, 4]))
+        self.assertEqual(len(hands), 13)
+        self.assertEqual(hands[0], [1, 2, 3, 4, 'SB'])
+        self.assertEqual(hands[1], [1, 2, 3, 4, 1])
+
+        hands = list(likely_hands([1, 2, 3]))
+        self.assertEqual(len(hands), 91)
+        self.assertEqual(hands[0], [1, 2, 3, 'SB', 1])
+        self.assertEqual(hands[12], [1, 2, 3, 'SB', 'SB'])
+
+        # Different cards are more likely than a pair
+        self.assertLess(hands.index([1, 2, 3, 1, 2]), hands.index([1, 2, 3, 1, 1]))
+
+    def test_likely_hands_max_draw(self):
+        self.assertEqual(list(likely_hands([1, 2], max_draw=2)), [])
+        self.assertEqual(len(list(likely_hands([1, 2], max_draw=3))), 455)
+
+    def test_calculate(self):
+        cache = MoveCache()
+        ponderer = Ponderer(cache, timeout=5)
+        values = {
+            'stock': 6,
+            'discards': [[12, 3], [7], [2], []],
+            'builds': [11, 1, 6, 9],
+        }
+        ponderer.calculate(hand=[3, 9, 7, 10], **values)
+
+        # Moves for likely hands are known
+        hits = cache.hits
+        expected = ai.calculate_move(hand=[3, 9, 7, 10, 5], **values)
+        self.assertEqual(ai.calculate_move(hand=[3, 9, 7, 10, 5], cache=cache, **values), expected)
+        self.assertGreater(cache.hits, hits)
+
+    def test_cancel(self):
+        cache = MoveCache()
+        ponderer = Ponderer(cache)
+        ponderer.cancelled.set()
+        ponderer.calculate(6, [[], [], [], []], [1, 2, 3, 4], [12, 12, 12, 12])
+        self.assertEqual(len(cache), 0)
+
+    def test_cancel_search(self):
+        # Searches stopped halfway don't store partial results
+        class CancelAfter(object):
+            def __init__(self, checks):
+                self.checks = checks
+
+            def is_set(self):
+                self.checks -= 1
+                return self.checks < 0
+
+        cache = MoveCache()
+        ponderer = Ponderer(cache)
+        ponderer.cancelled = CancelAfter(1)
+        ponderer.calculate('SB', [[9, 8, 7], [6, 5, 4], [3, 2], ['SB', 1]], ['SB', 'SB', 10, 11], [12, 3, 6, 9])
+        self.assertEqual(len(cache), 0)
+
+    def test_moves(self):
+        ponderer = Ponderer(timeout=5, max_hands=3)
+        values = {
+            'stock': 6,
+            'discards': [[12, 3], [7], [2], []],
+            'builds': [11, 1, 6, 9],
+        }
+        ponderer.calculate(hand=[3, 9, 7, 10], **values)
+
+        # Only the most likely hands are calculated
+        expected = ai.calculate_move(hand=[3, 9, 7, 10, 1], **values)
+        self.assertEqual(ponderer.moves(hand=[3, 9, 7, 10, 1], **values), expected)
+        self.assertEqual(ponderer.moves(hand=[3, 9, 7, 10, 5], **values), None)
+
+    def test_gate(self):
+        gate = SearchGate()
+        interrupt = Interrupt(Event(), gate)
+        self.assertFalse(interrupt.is_set())
+
+        # Bot searching on its turn stops pondering
+        gate.begin()
+        self.assertTrue(interrupt.is_set())
+        self.assertTrue(interrupt.yielded)
+
+        cancelled = Event()
+        cancelled.set()
+        gate.wait(cancelled)
+
+        gate.end()
+        self.assertFalse(gate.busy())
+        gate.wait(Event())
+
+
+if __name__ == '__main__':
+    unittest.main()
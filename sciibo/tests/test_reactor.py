@@ -0,0 +1,96 @@
+import logging
+import socket
+import unittest
+
+from sciibo.core.helpers import Queue
+from sciibo.network.connection import ConnectionThread
+from sciibo.network.reactor import ConnectionHandler, Reactor, selectors
+
+
+@unittest.skipIf(selectors is None, "selectors not available")
+class TestReactor(unittest.TestCase):
+    def setUp(self):
+        self.reactor = Reactor()
+        self.reactor.start()
+
+        server_sock, client_sock = socket.socketpair()
+        self.received = Queue()
+        self.handler = ConnectionHandler(self.reactor, server_sock)
+        self.handler.on('receive', lambda conn, data: self.received.put(data))
+        self.handler.start()
+
+        # Client uses the thread implementation
+        self.client_received = Queue()
+        self.client = ConnectionThread(client_sock)
+        self.client.on('receive', lambda conn, data: self.client_received.put(data))
+        self.client.start()
+
+    def tearDown(self):
+        self.client.stop()
+        self.reactor.stop()
+        self.client.join(1)
+        self.reactor.join(1)
+
+    def test_receive(self):
+        self.client.send({'type': 'join', 'name': 'Anna'})
+        self.client.send({'type': 'play', 'value': 'SB'})
+        self.assertEqual(self.received.get(timeout=2), {'type': 'join', 'name': 'Anna'})
+        self.assertEqual(self.received.get(timeout=2), {'type': 'play', 'value': 'SB'})
+
+    def test_send(self):
+        for n in range(100):
+            self.handler.send({'type': 'turn', 'player': n})
+        for n in range(100):
+            self.assertEqual(self.client_received.get(timeout=2), {'type': 'turn', 'player': n})
+
+    def test_disconnect(self):
+        self.client.stop()
+        self.assertEqual(self.received.get(timeout=2), {'type': 'disconnect'})
+
+    def test_limit(self):
+        # Messages exceeding the queue limit drop the connection
+        self.handler.limit = 100
+        self.handler.send({'type': 'hand', 'cards': list(range(100))})
+        self.assertEqual(self.received.get(timeout=2), {'type': 'disconnect'})
+        self.assertEqual(self.client_received.get(timeout=2), {'type': 'disconnect'})
+
+    def test_handler_error(self):
+        # Error closes only the failing connection
+        def fail():
+            raise socket.error("Broken")
+        self.handler.on_readable = fail
+
+        logging.disable(logging.ERROR)
+        try:
+            self.client.send({'type': 'join', 'name': 'Anna'})
+            self.assertEqual(self.received.get(timeout=2), {'type': 'disconnect'})
+            self.assertEqual(self.client_received.get(timeout=2), {'type': 'disconnect'})
+        finally:
+            logging.disable(logging.NOTSET)
+        self.assertTrue(self.reactor.is_alive())
+
+        # Reactor still handles other connections
+        server_sock, client_sock = socket.socketpair()
+        client_sock.settimeout(2)
+        handler = ConnectionHandler(self.reactor, server_sock)
+        handler.send({'type': 'welcome', 'id': 1})
+        handler.start()
+        self.assertEqual(client_sock.recv(4096)[4:], b'{"type": "welcome", "id": 1}')
+        handler.stop()
+        client_sock.close()
+
+    def test_modify_unregistered(self):
+        handler = ConnectionHandler(self.reactor, socket.socket())
+        self.assertFalse(self.reactor.modify(handler, selectors.EVENT_READ))
+        handler.sock.close()
+
+    def test_stop(self):
+        # Queued messages are sent before closing
+        self.handler.send({'type': 'kick'})
+        self.handler.stop()
+        self.assertEqual(self.client_received.get(timeout=2), {'type': 'kick'})
+        self.assertEqual(self.client_received.get(timeout=2), {'type': 'disconnect'})
+
+
+if __name__ == '__main__':
+    unittest.main()
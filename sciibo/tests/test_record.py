@@ -0,0 +1,77 @@
+import io
+import random
+import unittest
+
+from sciibo.server.record import Recorder, Replay, ReplayRandom, read_games
+from sciibo.sim import Policy, Simulator
+
+
+class TestRecord(unittest.TestCase):
+    def setUp(self):
+        # Record a few games
+        self.stream = io.StringIO()
+        self.simulator = Simulator(
+            [Policy(budget=200), Policy(budget=200)],
+            cards=5,
+            rng=random.Random(4),
+            recorder=Recorder(self.stream),
+        )
+        self.results = [self.simulator.play() for n in range(3)]
+        self.stream.seek(0)
+        self.games = read_games(self.stream)
+
+    def test_read_games(self):
+        self.assertEqual(len(self.games), 3)
+        for events in self.games:
+            self.assertEqual(events[0]['event'], 'start')
+            self.assertEqual(events[-1]['event'], 'end')
+
+    def test_replay(self):
+        replay = Replay(self.games[-1])
+        self.assertEqual(replay.plies, sum(self.results[-1].moves))
+
+        # Same state as the simulated game
+        game = replay.game()
+        expected = self.simulator.game
+        self.assertTrue(game.ended)
+        self.assertEqual(game.winner, expected.winner)
+        self.assertEqual(game.build_cards, expected.build_cards)
+        self.assertEqual(game.draw_pile.cards, expected.draw_pile.cards)
+        for player, expected_player in zip(game.players, expected.players):
+            self.assertEqual(player.hand, expected_player.hand)
+            self.assertEqual(player.stock_pile.cards, expected_player.stock_pile.cards)
+
+    def test_replay_ply(self):
+        replay = Replay(self.games[0])
+        self.assertEqual(replay.game(0).build_cards, [12, 12, 12, 12])
+
+        # One card played
+        game = replay.game(1)
+        cards = sum(len(player.hand) + len(player.stock_pile) for player in game.players)
+        self.assertEqual(cards, 2 * (5 + 5) - 1)
+
+    def test_positions(self):
+        positions = list(Replay(self.games[0]).positions())
+        ply, player, stock, discards, hand, builds = positions[0]
+        self.assertEqual(ply, 0)
+        self.assertEqual(len(hand), 5)
+        self.assertEqual(builds, [12, 12, 12, 12])
+        self.assertEqual(positions[-1][0], Replay(self.games[0]).plies)
+
+    def test_replay_random(self):
+        rng = ReplayRandom([[3, 1, 2]])
+        cards = [1, 2, 3]
+        rng.shuffle(cards)
+        self.assertEqual(cards, [3, 1, 2])
+
+        # No shuffles left
+        with self.assertRaises(ValueError):
+            rng.shuffle(cards)
+
+        # Different cards
+        with self.assertRaises(ValueError):
+            ReplayRandom([[1, 2]]).shuffle([1, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
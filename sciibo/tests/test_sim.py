@@ -0,0 +1,59 @@
+import random
+import unittest
+
+from sciibo.bot.game import Game
+from sciibo.bot.plan import Plan
+from sciibo.sim import Policy, Simulator
+
+
+class TestSimulator(unittest.TestCase):
+    def setUp(self):
+        random.seed(1)
+
+    def test_play(self):
+        simulator = Simulator(cards=5)
+        for n in range(10):
+            result = simulator.play()
+            self.assertIn(result.winner, (0, 1))
+
+            # Winner played all stock cards
+            self.assertEqual(result.stock[result.winner], 5)
+            self.assertGreater(result.turns, 0)
+            self.assertGreaterEqual(sum(result.calculations), result.turns)
+
+    def test_players(self):
+        policies = [Policy(budget=100) for n in range(4)]
+        result = Simulator(policies, cards=5).play()
+        self.assertEqual(len(result.moves), 4)
+        self.assertTrue(all(result.moves))
+
+    def test_seeded(self):
+        first = Simulator(rng=random.Random(3)).play()
+        second = Simulator(rng=random.Random(3)).play()
+        self.assertEqual(first.winner, second.winner)
+        self.assertEqual(first.turns, second.turns)
+        self.assertEqual(first.moves, second.moves)
+
+    def test_max_turns(self):
+        result = Simulator(max_turns=3).play()
+        self.assertEqual(result.winner, None)
+        self.assertEqual(result.turns, 3)
+
+    def test_policy_repair(self):
+        game = Game()
+        game.stock_card = 9
+        game.discard_piles = [[5], [], [], []]
+        game.hand = [1, 2, 3, 4, 7]
+        game.build_piles = [12, 12, 12, 12]
+
+        # Repair searches are limited by the policy
+        plan = Plan([(1, 'hand', 'build:0'), (2, 'hand', 'build:0')])
+        Policy(budget=0).repair(plan, game)
+        self.assertEqual(len(plan), 2)
+
+        Policy().repair(plan, game)
+        self.assertEqual(len(plan), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from sciibo.sim.tournament import Tournament, parse_policy, play_game, wilson
+
+
+class TestTournament(unittest.TestCase):
+    def test_parse_policy(self):
+        policy = parse_policy('fast:timeout=0.5,budget=100,anytime=no')
+        self.assertEqual(policy.name, 'fast')
+        self.assertEqual(policy.timeout, 0.5)
+        self.assertEqual(policy.budget, 100)
+        self.assertFalse(policy.anytime)
+
+        self.assertEqual(parse_policy('narrow:beam=50').beam, 50)
+
+        policy = parse_policy('full')
+        self.assertEqual(policy.timeout, None)
+        self.assertEqual(policy.budget, None)
+
+        with self.assertRaises(ValueError):
+            parse_policy('fast:speed=1')
+
+    def test_wilson(self):
+        low, high = wilson(60, 100)
+        self.assertAlmostEqual(low, 0.502, places=3)
+        self.assertAlmostEqual(high, 0.691, places=3)
+        self.assertEqual(wilson(0, 0), (0.0, 1.0))
+        self.assertEqual(wilson(10, 10)[1], 1.0)
+
+    def test_seeded(self):
+        policies = [parse_policy('a'), parse_policy('b')]
+        seed, rotation, first = play_game(policies, 5, 1000, 7, 0)
+        seed, rotation, second = play_game(policies, 5, 1000, 7, 0)
+        self.assertEqual(first.winner, second.winner)
+        self.assertEqual(first.moves, second.moves)
+
+    def test_run(self):
+        policies = [parse_policy('a:budget=100'), parse_policy('b:budget=100')]
+        tournament = Tournament(policies, games=6, cards=5)
+        self.assertEqual(list(tournament.run()), [1, 2, 3, 4, 5, 6])
+
+        standings = tournament.standings
+        self.assertEqual([standing.games for standing in standings], [6, 6])
+        self.assertEqual(sum(standing.wins for standing in standings) + tournament.undecided, 6)
+        self.assertEqual(standings[0].turns, standings[1].turns)
+        self.assertIn('Undecided', tournament.report())
+
+
+if __name__ == '__main__':
+    unittest.main()